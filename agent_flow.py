@@ -1,14 +1,256 @@
+import asyncio
 import json
 import os
+import queue
+import re
 import threading
+import time
 
 import requests
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
 from dotenv import load_dotenv
-from elevenlabs import play
 from elevenlabs.client import ElevenLabs
 
+from async_runtime import run_sync
+from audio_output import TTS_OUTPUT_FORMAT, StreamingAudioPlayer
+from proactive_retrieval import query_coverage, request_query
 from tools import ToolManager
+from transcript_summarizer import RollingTranscriptSummarizer
+
+# Marks the end of a prompt prefix the API should cache between calls
+CACHE_CONTROL = {"type": "ephemeral"}
+# Transcript blocks sent per request before they are merged (which costs one cache miss)
+MAX_TRANSCRIPT_BLOCKS = 12
+
+# Sentence ends: terminal punctuation (optionally closed by a quote/bracket) then whitespace
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+# Shorter sentences are joined with the next one so TTS is not too choppy
+MIN_SPEECH_CHARS = 12
+# Sentences allowed to be synthesizing or waiting ahead of playback
+MAX_PENDING_AUDIO = 2
+
+
+def _assistant_content(content_blocks):
+    """Convert response content blocks into an assistant message's content list"""
+    content = []
+    for block in content_blocks:
+        if block.type == "text" and block.text:
+            content.append({"type": "text", "text": block.text})
+        elif block.type == "tool_use":
+            content.append(
+                {"type": "tool_use", "id": block.id, "name": block.name, "input": block.input}
+            )
+    return content
+
+
+class SentenceSplitter:
+    """Cuts streamed model text into sentences as soon as each one is complete"""
+
+    def __init__(self, min_chars=MIN_SPEECH_CHARS):
+        self.min_chars = min_chars
+        self.buffer = ""
+
+    def feed(self, text):
+        """Add streamed text and return the sentences it completed"""
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SENTENCE_END_PATTERN.finditer(self.buffer):
+            if match.end() - start < self.min_chars:
+                continue
+            sentences.append(self.buffer[start : match.end()].strip())
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Return whatever text is left once the stream ends"""
+        text, self.buffer = self.buffer.strip(), ""
+        return text
+
+
+# Tool calls from one model turn run concurrently, at most this many at once
+MAX_PARALLEL_TOOLS = 4
+# Seconds to wait for a tool before reporting a timeout to the model
+DEFAULT_TOOL_TIMEOUT_SECONDS = 30
+TOOL_TIMEOUT_SECONDS = {
+    "search_knowledge": 15,
+    "create_jira_ticket": 30,
+    "create_calendar_invite": 30,
+    "send_email": 30,
+}
+# Tools with side effects. The activation deadline does not cut them short, and
+# if one still times out its worker may yet succeed, so the model is told the
+# outcome is unknown rather than that it failed (a retry could duplicate it)
+WRITE_TOOLS = frozenset({"create_jira_ticket", "create_calendar_invite", "send_email"})
+
+# Agent loop budgets; when one runs out the model is asked for a final answer
+AGENT_MAX_STEPS = int(os.environ.get("AGENT_MAX_STEPS", "5"))  # Model calls per activation
+AGENT_MAX_INPUT_TOKENS = int(os.environ.get("AGENT_MAX_INPUT_TOKENS", "60000"))
+AGENT_MAX_OUTPUT_TOKENS = int(os.environ.get("AGENT_MAX_OUTPUT_TOKENS", "4000"))
+AGENT_DEADLINE_SECONDS = float(os.environ.get("AGENT_DEADLINE_SECONDS", "30"))
+# Limits for the forced final answer, so the worst case stays bounded
+FINAL_ANSWER_MAX_TOKENS = 256
+FINAL_ANSWER_TIMEOUT_SECONDS = 10
+# Time kept back from the deadline for the forced final answer
+FINAL_ANSWER_RESERVE_SECONDS = 5
+# Spoken when even the forced final answer fails
+DEADLINE_FALLBACK_ANSWER = "Sorry, I couldn't get to that in time. Could you ask me again?"
+
+# Speculative retrieval: search for the latest request while the first model call runs
+SPECULATIVE_RETRIEVAL = os.environ.get("SPECULATIVE_RETRIEVAL", "1") != "0"
+# How long the first call may wait for the speculative search, to send its
+# results up front. By default it does not wait: the first call starts at once
+# and the result answers the model's search_knowledge call when it comes
+SPECULATIVE_CONTEXT_WAIT_SECONDS = float(os.environ.get("SPECULATIVE_CONTEXT_WAIT_SECONDS", "0"))
+# Share of a search_knowledge query's indexed terms (weighted by rarity) the
+# speculative query must contain for the speculative result to stand in for it
+SPECULATIVE_MATCH_COVERAGE = 0.5
+
+
+class SpeculativeSearch:
+    """A knowledge search started from the transcript before the model asks for one"""
+
+    def __init__(self, query, search):
+        """
+        Start the search as a task on the running event loop.
+
+        Args:
+            query: Search query derived from the latest request
+            search: Coroutine function taking the query and returning the JSON result
+        """
+        self.query = query
+        self.started = time.perf_counter()
+        self.seconds = None
+        # How the result reached the model: "context", "tool" or None
+        self.used = None
+        self.task = asyncio.ensure_future(self._run(search))
+
+    async def _run(self, search):
+        try:
+            return await search(self.query)
+        except Exception as e:
+            print(f"Speculative search failed: {e}")
+            return None
+        finally:
+            self.seconds = time.perf_counter() - self.started
+
+    def matches(self, query):
+        """Whether the speculative result can answer a search for query"""
+        return query_coverage(query, self.query) >= SPECULATIVE_MATCH_COVERAGE
+
+    async def result_within(self, seconds):
+        """Return the result if the search finishes within seconds, otherwise None"""
+        done, _ = await asyncio.wait({self.task}, timeout=seconds)
+        return self.task.result() if done else None
+
+
+# Tool definitions sent with every request
+AGENT_TOOLS = [
+    {
+        "name": "search_knowledge",
+        "description": """Search for previous context about a particular issue or topic. This knowledge base includes previous meetings as well as jira tickets.""",
+        "input_schema": {
+            "type": "object",
+            "properties": {"query": {"type": "string"}},
+            "required": ["query"],
+        },
+    },
+    {
+        "name": "create_jira_ticket",
+        "description": """Create a new Jira ticket to track an issue, task, or action item.""",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "summary": {
+                    "type": "string",
+                    "description": "The summary/title of the ticket",
+                },
+                "description": {
+                    "type": "string",
+                    "description": "The detailed description of the ticket",
+                },
+                "issue_type": {
+                    "type": "string",
+                    "description": "The type of issue (e.g., 'Task', 'Bug', 'Story')",
+                    "default": "Task",
+                },
+                "labels": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "List of labels to add to the ticket",
+                },
+                "assignee": {
+                    "type": "string",
+                    "description": "Account ID or email of the user to assign the ticket to",
+                },
+            },
+            "required": ["project_key", "summary", "description"],
+        },
+    },
+    {
+        "name": "create_calendar_invite",
+        "description": """Create and send a calendar invitation for a meeting.""",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "summary": {
+                    "type": "string",
+                    "description": "The title/summary of the meeting",
+                },
+                "start_time": {
+                    "type": "string",
+                    "description": "The meeting start time in ISO format (YYYY-MM-DDTHH:MM:SS)",
+                },
+                "end_time": {
+                    "type": "string",
+                    "description": "The meeting end time in ISO format (YYYY-MM-DDTHH:MM:SS); optional if duration_minutes is provided",
+                },
+                "duration_minutes": {
+                    "type": "integer",
+                    "description": "Duration of the meeting in minutes (used if end_time is not provided)",
+                    "default": 60,
+                },
+                "description": {
+                    "type": "string",
+                    "description": "Detailed description or agenda for the meeting",
+                },
+                "location": {
+                    "type": "string",
+                    "description": "Physical location or virtual meeting link",
+                },
+                "attendees": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "A list of the display names of the employees as they appear in JIRA tickets (e.g., 'TEAM_MEMBER_1').",
+                },
+            },
+            "required": ["summary", "start_time"],
+        },
+    },
+    {
+        "name": "send_email",
+        "description": """Sends an email notification to a specified recipient.""",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "recipient": {
+                    "type": "string",
+                    "description": "The display name of the employee as it appears in JIRA tickets (e.g., 'TEAM_MEMBER_1').",
+                },
+                "subject": {
+                    "type": "string",
+                    "description": "The subject line of the email.",
+                },
+                "body": {
+                    "type": "string",
+                    "description": "The main content/body of the email.",
+                },
+            },
+            "required": ["recipient", "subject", "body"],
+        },
+    },
+]
 
 
 class AgentManager:
@@ -30,12 +272,31 @@ class AgentManager:
         self.callback_status_update = callback_status_update
 
         self.anthropic_client = Anthropic(api_key=self.anthropic_api_key)
+        # Used by the agent loop, which runs on the shared event loop (async_runtime)
+        self.async_anthropic_client = AsyncAnthropic(api_key=self.anthropic_api_key)
 
         self.elevenlabs_client = ElevenLabs(api_key=self.elevenlabs_api_key)
 
-        # Track current active speech thread and add a lock for thread synchronization
-        self.active_speech_thread = None
-        self.speech_lock = threading.Lock()
+        # Speech pipeline: sentences are synthesized on one thread and played on
+        # another, so the next sentence is converted while the current one plays.
+        # Audio is streamed to an output device that stays open between utterances.
+        self.audio_player = StreamingAudioPlayer()
+        self.sentence_queue = queue.Queue()
+        self.audio_queue = queue.Queue(maxsize=MAX_PENDING_AUDIO)
+        threading.Thread(target=self._synthesis_loop, name="tts-synthesis", daemon=True).start()
+        threading.Thread(target=self._playback_loop, name="tts-playback", daemon=True).start()
+
+        # Older transcript is summarized in the background to keep prompts bounded
+        self.transcript_summarizer = RollingTranscriptSummarizer(self.anthropic_client)
+
+        # Prompt size per activation (see get_prompt_metrics). Activations may run
+        # concurrently on the shared loop, so each one's metrics dict is passed
+        # explicitly through the agent loop; current_activation is only the most
+        # recently started one, for speech queued from outside an activation
+        self.activation_metrics = []
+        self.current_activation = None
+        # Toggle to compare time to answer with and without speculation
+        self.speculative_retrieval = SPECULATIVE_RETRIEVAL
 
         self.system_prompt = """
             ### Role
@@ -62,6 +323,19 @@ class AgentManager:
             Your primary goal is to guide users to successful completion of tasks and overall team effectiveness.
             """
 
+        # The system prompt and tool schema never change, so both are cached
+        # (tools come first in the prompt, so their breakpoint covers the tools
+        # alone and the system breakpoint covers tools + system prompt)
+        self.system_blocks = [
+            {"type": "text", "text": self.system_prompt, "cache_control": CACHE_CONTROL}
+        ]
+        self.tools = [dict(tool) for tool in AGENT_TOOLS]
+        self.tools[-1]["cache_control"] = CACHE_CONTROL
+
+        # Transcript text sent on earlier activations, one block per activation,
+        # so the next request shares a cacheable prefix with the previous one
+        self.transcript_blocks = []
+
     def load_transcript_from_file(self, file_path="transcript.txt"):
         """Load a meeting transcript from a file for debugging purposes"""
         try:
@@ -87,6 +361,22 @@ class AgentManager:
             return None
 
     def run_agent(self, transcript, on_agent_response=None):
+        """
+        Run the agent with the meeting transcript context, blocking until it finishes.
+
+        Synchronous wrapper around run_agent_async; runs it on the shared event
+        loop, so it must not be called from that loop's thread.
+
+        Args:
+            transcript: The current meeting transcript text
+            on_agent_response: Optional callback function that will be called with the agent's final response
+
+        Returns:
+            The agent's final response text
+        """
+        return run_sync(self.run_agent_async(transcript, on_agent_response))
+
+    async def run_agent_async(self, transcript, on_agent_response=None):
         """
         Run the agent with the meeting transcript context
 
@@ -109,151 +399,100 @@ class AgentManager:
             if self.callback_status_update:
                 self.callback_status_update("Agent Processing...", "blue")
 
-            # Prepare initial messages for Claude API
-            user_message = f"Here's the transcript of our meeting so far:\n\n{transcript}\n\nCheck for the most recent message asking for your help and respond to it."
-            initial_messages = [{"role": "user", "content": user_message}]
+            # Summary of older discussion plus the recent transcript verbatim
+            transcript_context = self.transcript_summarizer.build_context(transcript)
+            activation = {
+                "started_at": time.time(),
+                "transcript_chars": len(transcript),
+                "context_chars": len(transcript_context),
+                "llm_calls": 0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "first_call_input_tokens": None,
+                "first_call_seconds": None,
+                "first_token_seconds": None,
+                "first_audio_seconds": None,
+                "started_perf": time.perf_counter(),
+                "cache_read_tokens": 0,
+                "cache_write_tokens": 0,
+                "prompt_tokens": 0,
+                "steps": [],
+                "stop_reason": None,
+                "speculative": self.speculative_retrieval,
+                "speculative_query": None,
+                "speculative_search_seconds": None,
+                "speculation_used": None,
+                "answer_seconds": None,
+            }
+            self.current_activation = activation
+            self.activation_metrics.append(activation)
 
-            # Define tools for the API call
-            tools = [
-                {
-                    "name": "search_knowledge",
-                    "description": """Search for previous context about a particular issue or topic. This knowledge base includes previous meetings as well as jira tickets.""",
-                    "input_schema": {
-                        "type": "object",
-                        "properties": {"query": {"type": "string"}},
-                        "required": ["query"],
-                    },
-                },
-                {
-                    "name": "create_jira_ticket",
-                    "description": """Create a new Jira ticket to track an issue, task, or action item.""",
-                    "input_schema": {
-                        "type": "object",
-                        "properties": {
-                            "summary": {
-                                "type": "string",
-                                "description": "The summary/title of the ticket",
-                            },
-                            "description": {
-                                "type": "string",
-                                "description": "The detailed description of the ticket",
-                            },
-                            "issue_type": {
-                                "type": "string",
-                                "description": "The type of issue (e.g., 'Task', 'Bug', 'Story')",
-                                "default": "Task",
-                            },
-                            "labels": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "List of labels to add to the ticket",
-                            },
-                            "assignee": {
-                                "type": "string",
-                                "description": "Account ID or email of the user to assign the ticket to",
-                            },
-                        },
-                        "required": ["project_key", "summary", "description"],
-                    },
-                },
-                {
-                    "name": "create_calendar_invite",
-                    "description": """Create and send a calendar invitation for a meeting.""",
-                    "input_schema": {
-                        "type": "object",
-                        "properties": {
-                            "summary": {
-                                "type": "string",
-                                "description": "The title/summary of the meeting",
-                            },
-                            "start_time": {
-                                "type": "string",
-                                "description": "The meeting start time in ISO format (YYYY-MM-DDTHH:MM:SS)",
-                            },
-                            "end_time": {
-                                "type": "string",
-                                "description": "The meeting end time in ISO format (YYYY-MM-DDTHH:MM:SS); optional if duration_minutes is provided",
-                            },
-                            "duration_minutes": {
-                                "type": "integer",
-                                "description": "Duration of the meeting in minutes (used if end_time is not provided)",
-                                "default": 60,
-                            },
-                            "description": {
-                                "type": "string",
-                                "description": "Detailed description or agenda for the meeting",
-                            },
-                            "location": {
-                                "type": "string",
-                                "description": "Physical location or virtual meeting link",
-                            },
-                            "attendees": {
-                                "type": "array",
-                                "items": {"type": "string"},
-                                "description": "A list of the display names of the employees as they appear in JIRA tickets (e.g., 'TEAM_MEMBER_1').",
-                            },
-                        },
-                        "required": ["summary", "start_time"],
-                    },
-                },
-                {
-                    "name": "send_email",
-                    "description": """Sends an email notification to a specified recipient.""",
-                    "input_schema": {
-                        "type": "object",
-                        "properties": {
-                            "recipient": {
-                                "type": "string",
-                                "description": "The display name of the employee as it appears in JIRA tickets (e.g., 'TEAM_MEMBER_1').",
-                            },
-                            "subject": {
-                                "type": "string",
-                                "description": "The subject line of the email.",
-                            },
-                            "body": {
-                                "type": "string",
-                                "description": "The main content/body of the email.",
-                            },
-                        },
-                        "required": ["recipient", "subject", "body"],
-                    },
-                },
-            ]
+            # Start searching for the latest request right away, alongside the first call
+            speculation = None
+            if self.speculative_retrieval:
+                query = request_query(transcript)
+                if query:
+                    print(f"[Speculative] Searching ahead for '{query}'")
+                    speculation = SpeculativeSearch(query, self.tool_manager.search_knowledge_async)
+                    activation["speculative_query"] = query
 
-            # Call Claude API using the SDK
-            response = self.anthropic_client.messages.create(
-                model="claude-3-5-haiku-20241022",  # Changed to Haiku
-                max_tokens=1024,
-                system=self.system_prompt,
-                messages=initial_messages,
-                tools=tools,
-                tool_choice={"type": "auto"},  # Let Claude decide when to use tools
-            )
-            # --- Log Claude Response ---
-            print("--- Claude Initial Response ---")
-            # Iterate through content blocks and log only text/tool use
-            if response and hasattr(
-                response, "content"
-            ):  # Check if response and content exist
-                for content_block in response.content:
-                    if content_block.type == "text":
-                        print(f"[Claude Text]: {content_block.text}")
-                    elif content_block.type == "tool_use":
-                        print(
-                            f"[Claude Tool Use]: Name={content_block.name}, Input={content_block.input}"
-                        )
+            # Prepare initial messages for Claude API
+            initial_content = self._build_transcript_content(transcript_context)
+            if speculation is not None:
+                await self._add_speculative_context(initial_content, speculation)
+            initial_messages = [{"role": "user", "content": initial_content}]
+            tools = self.tools
+
+            # Call Claude API using the SDK, speaking each sentence as it streams in
+            try:
+                response = await self._stream_claude_response(
+                    activation,
+                    model="claude-3-5-haiku-20241022",  # Changed to Haiku
+                    max_tokens=1024,
+                    system=self.system_blocks,
+                    messages=initial_messages,
+                    tools=tools,
+                    tool_choice={"type": "auto"},  # Let Claude decide when to use tools
+                    timeout=self._model_call_timeout(activation["started_perf"] + AGENT_DEADLINE_SECONDS),
+                )
+            except asyncio.TimeoutError:
+                # Degrade like the agent loop does: a short answer without tools
+                print("First Claude call hit the deadline; forcing a final answer")
+                activation["stop_reason"] = "deadline"
+                final_text = await self._force_final_answer(activation, initial_messages, tools)
+                activation["answer_seconds"] = time.perf_counter() - activation["started_perf"]
+                await asyncio.to_thread(self._wait_for_speech)
             else:
-                print(
-                    "[Log Warning] Could not parse Claude response content for simplified logging."
+                # --- Log Claude Response ---
+                print("--- Claude Initial Response ---")
+                # Iterate through content blocks and log only text/tool use
+                if response and hasattr(
+                    response, "content"
+                ):  # Check if response and content exist
+                    for content_block in response.content:
+                        if content_block.type == "text":
+                            print(f"[Claude Text]: {content_block.text}")
+                        elif content_block.type == "tool_use":
+                            print(
+                                f"[Claude Tool Use]: Name={content_block.name}, Input={content_block.input}"
+                            )
+                else:
+                    print(
+                        "[Log Warning] Could not parse Claude response content for simplified logging."
+                    )
+                    print(str(response))
+                print("-----------------------------")
+                # --- End Log ---
+
+                # Process response (check for tool calls or text)
+                final_text = await self._process_claude_response(
+                    activation, response, initial_messages, tools, speculation=speculation
                 )
-                print(str(response))
-            print("-----------------------------")
-            # --- End Log ---
 
-            # Process response (check for tool calls or text)
-            final_text = self._process_claude_response(
-                response, initial_messages, tools
-            )
+            if speculation is not None:
+                activation["speculative_search_seconds"] = speculation.seconds
+                activation["speculation_used"] = speculation.used
+            self._log_activation_metrics(activation)
 
             # Update status when complete
             if self.callback_status_update:
@@ -271,154 +510,588 @@ class AgentManager:
                 self.callback_status_update(f"Error: {str(e)[:30]}...", "red")
             return None
 
-    def _process_claude_response(self, response, current_messages, tools):
-        """Process the Claude response, handling tool calls if necessary."""
-
-        # Process this response and any follow-up responses with tool calls
-        def process_response(response, messages, accumulated_text=""):
-            tool_calls_made = False
-            search_knowledge_called = False
-            response_text = ""
-            assistant_responses = []
-
-            # Process content blocks in the response
-            for content_block in response.content:
-                if content_block.type == "text":
-                    response_text += content_block.text
-                    assistant_responses.append(
-                        {"role": "assistant", "content": content_block.text}
+    def update_transcript(self, transcript):
+        """Let the summarizer fold older transcript in the background as the meeting goes on"""
+        self.transcript_summarizer.update(transcript)
+
+    def _build_transcript_content(self, transcript_context):
+        """
+        Build the user message content for the transcript, marked for prompt caching.
+
+        The transcript is sent as one text block per activation: the blocks from
+        earlier activations are repeated unchanged and only the new text gets a
+        new block, so the cache written last time is a prefix of this request.
+        The cache breakpoint sits on the newest block for the next activation to
+        reuse. When the summarizer rewrites the start of the context the blocks
+        start over. Nothing here awaits, so concurrent activations never see a
+        half-updated block list.
+        """
+        sent = "".join(self.transcript_blocks)
+        if sent and transcript_context.startswith(sent):
+            new_text = transcript_context[len(sent):]
+            if new_text:
+                self.transcript_blocks.append(new_text)
+        else:
+            self.transcript_blocks = [transcript_context]
+        if len(self.transcript_blocks) > MAX_TRANSCRIPT_BLOCKS:
+            self.transcript_blocks = [transcript_context]
+
+        content = [{"type": "text", "text": "Here's the transcript of our meeting so far:\n\n"}]
+        content.extend({"type": "text", "text": block} for block in self.transcript_blocks)
+        content[-1]["cache_control"] = CACHE_CONTROL
+        content.append(
+            {
+                "type": "text",
+                "text": "\n\nCheck for the most recent message asking for your help and respond to it.",
+            }
+        )
+        return content
+
+    async def _add_speculative_context(self, content, speculation):
+        """
+        Add the speculative search results to the first message if they are ready in time.
+
+        Only used when SPECULATIVE_CONTEXT_WAIT_SECONDS is set. The results go
+        after the cached transcript blocks, so the prompt cache is unaffected.
+        When they are not ready the model calls search_knowledge as usual and
+        the speculative result answers that call instead.
+        """
+        if SPECULATIVE_CONTEXT_WAIT_SECONDS <= 0:
+            return
+        results = await speculation.result_within(SPECULATIVE_CONTEXT_WAIT_SECONDS)
+        if results is None:
+            return
+        speculation.used = "context"
+        print(f"[Speculative] Results ready after {speculation.seconds:.2f}s; sending them up front")
+        content.append(
+            {
+                "type": "text",
+                "text": (
+                    f'Knowledge base results for "{speculation.query}", searched ahead of time. '
+                    "Use them if they cover the request instead of calling search_knowledge again:\n"
+                    f"{results}"
+                ),
+            }
+        )
+
+    def _record_usage(self, activation, response, seconds=None):
+        """Log a Claude response's token usage and add it to the activation's metrics"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+        print(
+            f"[Claude Usage] input={usage.input_tokens} cache_read={cache_read} "
+            f"cache_write={cache_write} output={usage.output_tokens}"
+            + (f" in {seconds:.2f}s" if seconds is not None else "")
+        )
+        if activation is None:
+            return
+        metrics = activation
+        metrics["llm_calls"] += 1
+        metrics["input_tokens"] += usage.input_tokens
+        metrics["output_tokens"] += usage.output_tokens
+        metrics["cache_read_tokens"] += cache_read
+        metrics["cache_write_tokens"] += cache_write
+        metrics["prompt_tokens"] += usage.input_tokens + cache_read + cache_write
+        metrics["steps"].append(
+            {
+                "step": len(metrics["steps"]) + 1,
+                "kind": "model",
+                "seconds": seconds,
+                "input_tokens": usage.input_tokens + cache_read + cache_write,
+                "output_tokens": usage.output_tokens,
+            }
+        )
+        if metrics["first_call_input_tokens"] is None:
+            # input_tokens excludes cached tokens, so add them back for the prompt size
+            metrics["first_call_input_tokens"] = usage.input_tokens + cache_read + cache_write
+            metrics["first_call_seconds"] = seconds
+
+    def _log_activation_metrics(self, metrics):
+        print(
+            f"[Agent Metrics] Prompt tokens: {metrics['first_call_input_tokens']} first call, "
+            f"{metrics['input_tokens']} uncached total over {metrics['llm_calls']} call(s), "
+            f"{metrics['cache_read_tokens']} read from cache; "
+            f"transcript {metrics['transcript_chars']} chars sent as {metrics['context_chars']}"
+        )
+        if metrics["first_call_seconds"] is not None:
+            print(f"[Agent Metrics] First model call took {metrics['first_call_seconds']:.2f}s")
+        if metrics["first_token_seconds"] is not None:
+            print(f"[Agent Metrics] Time to first token: {metrics['first_token_seconds']:.2f}s")
+        if metrics["first_audio_seconds"] is not None:
+            print(f"[Agent Metrics] Time to first audio: {metrics['first_audio_seconds']:.2f}s")
+        if metrics["answer_seconds"] is not None:
+            if not metrics["speculative"]:
+                speculation = "off"
+            elif metrics["speculative_query"] is None:
+                speculation = "no request found"
+            else:
+                speculation = metrics["speculation_used"] or "unused"
+            print(
+                f"[Agent Metrics] Time to answer: {metrics['answer_seconds']:.2f}s "
+                f"(speculative retrieval: {speculation})"
+            )
+        for step in metrics["steps"]:
+            seconds = f"{step['seconds']:.2f}s" if step["seconds"] is not None else "?"
+            if step["kind"] == "tools":
+                print(f"[Agent Metrics]   step {step['step']}: tools {step['tools']} {seconds}")
+            else:
+                print(
+                    f"[Agent Metrics]   step {step['step']}: {step['kind']} {seconds}, "
+                    f"{step['input_tokens']} in / {step['output_tokens']} out"
+                )
+        print(
+            f"[Agent Metrics] Activation took "
+            f"{time.perf_counter() - metrics['started_perf']:.2f}s, "
+            f"{metrics['prompt_tokens']} prompt / {metrics['output_tokens']} output tokens, "
+            f"stopped: {metrics['stop_reason']}"
+        )
+
+    def get_prompt_metrics(self):
+        """
+        Return prompt size metrics for every activation so far.
+
+        Returns:
+            List of dicts with transcript/context sizes and token usage per activation
+        """
+        return [dict(metrics) for metrics in self.activation_metrics]
+
+    def get_speculation_report(self):
+        """
+        Compare time to answer across activations with and without speculative retrieval.
+
+        Returns:
+            Dict keyed "with_speculation" / "without_speculation", each holding the
+            number of answered activations and their mean and worst time to answer,
+            plus how often the speculative result was used
+        """
+        report = {}
+        for label, enabled in (("with_speculation", True), ("without_speculation", False)):
+            runs = [
+                metrics
+                for metrics in self.activation_metrics
+                if metrics.get("speculative") == enabled and metrics.get("answer_seconds") is not None
+            ]
+            times = [metrics["answer_seconds"] for metrics in runs]
+            report[label] = {
+                "activations": len(runs),
+                "mean_answer_seconds": sum(times) / len(times) if times else None,
+                "max_answer_seconds": max(times) if times else None,
+            }
+            if enabled:
+                report[label]["used_as_context"] = sum(
+                    metrics["speculation_used"] == "context" for metrics in runs
+                )
+                report[label]["used_for_tool_call"] = sum(
+                    metrics["speculation_used"] == "tool" for metrics in runs
+                )
+        return report
+
+    async def _call_tool(self, block, speculation=None):
+        """Run one tool call, answering a matching search from the speculative result"""
+        if (
+            speculation is not None
+            and block.name == "search_knowledge"
+            and speculation.matches(block.input.get("query", ""))
+        ):
+            # Shielded so a timeout here does not cancel the shared search
+            content = await asyncio.shield(speculation.task)
+            if content is not None:
+                speculation.used = speculation.used or "tool"
+                print(f"[Speculative] Answered search_knowledge from the search for '{speculation.query}'")
+                return content
+        return await self.tool_manager.execute_tool_async(block.name, block.input)
+
+    async def _execute_tools(self, tool_blocks, activation=None, deadline=None, speculation=None):
+        """
+        Run the tool_use blocks of one turn concurrently.
+
+        Args:
+            tool_blocks: tool_use content blocks from a Claude response
+            activation: Optional metrics dict of the activation, to record the step in
+            deadline: Optional time.perf_counter() value no tool may wait past
+            speculation: Optional SpeculativeSearch that can answer search_knowledge calls
+
+        Returns:
+            tool_result content blocks in the same order as tool_blocks
+        """
+        turn_started = time.perf_counter()
+        slots = asyncio.Semaphore(MAX_PARALLEL_TOOLS)
+
+        async def run_tool(block):
+            timeout = TOOL_TIMEOUT_SECONDS.get(block.name, DEFAULT_TOOL_TIMEOUT_SECONDS)
+            if deadline is not None and block.name not in WRITE_TOOLS:
+                timeout = max(0.0, min(timeout, deadline - time.perf_counter()))
+            tool_result = {
+                "type": "tool_result",
+                "tool_use_id": block.id,
+            }
+            print(f"Executing tool: {block.name} with input: {block.input}")
+            try:
+                async with slots:
+                    content = await asyncio.wait_for(self._call_tool(block, speculation), timeout)
+                # Tools return JSON strings, except the unknown-tool error dict
+                tool_result["content"] = content if isinstance(content, str) else json.dumps(content)
+                print(f"Tool result: {tool_result['content']}")
+            except asyncio.TimeoutError:
+                # Work already handed to a worker thread finishes in the background; its result is discarded
+                print(f"Tool {block.name} timed out after {timeout}s")
+                if block.name in WRITE_TOOLS:
+                    message = (
+                        f"{block.name} did not finish within {timeout} seconds and may still "
+                        "complete. Its outcome is unknown: do not retry it, tell the user it "
+                        "is still being processed."
+                    )
+                    tool_result["content"] = json.dumps(
+                        {"success": False, "outcome_unknown": True, "message": message}
                     )
-                elif content_block.type == "tool_use":
-                    tool_calls_made = True
-                    # Check if search_knowledge was called
-                    if content_block.name == "search_knowledge":
-                        search_knowledge_called = True
-
-                    # Add tool request to messages for context in follow-up
-                    assistant_responses.append(
-                        {
-                            "role": "assistant",
-                            "content": [
-                                {
-                                    "type": "tool_use",
-                                    "id": content_block.id,
-                                    "name": content_block.name,
-                                    "input": content_block.input,
-                                }
-                            ],
-                        }
+                else:
+                    tool_result["content"] = json.dumps(
+                        {"success": False, "message": f"{block.name} timed out after {timeout} seconds"}
                     )
+                tool_result["is_error"] = True
+            except Exception as e:
+                print(f"Tool {block.name} failed: {e}")
+                tool_result["content"] = json.dumps(
+                    {"success": False, "message": f"Error running {block.name}: {str(e)}"}
+                )
+                tool_result["is_error"] = True
+            return tool_result
 
-            # Add assistant responses to message history
-            messages.extend(assistant_responses)
+        # gather keeps the results in block order
+        tool_results_content = list(await asyncio.gather(*(run_tool(block) for block in tool_blocks)))
 
-            # Play speech for the current response text if it exists
-            if response_text.strip():
-                self._generate_and_play_speech_async(response_text)
+        seconds = time.perf_counter() - turn_started
+        print(f"[Agent Metrics] {len(tool_blocks)} tool call(s) took {seconds:.2f}s")
+        if activation is not None:
+            steps = activation["steps"]
+            steps.append(
+                {
+                    "step": len(steps) + 1,
+                    "kind": "tools",
+                    "seconds": seconds,
+                    "tools": [block.name for block in tool_blocks],
+                }
+            )
+        return tool_results_content
 
-            # If no tool calls, return the accumulated text plus this response's text
-            if not tool_calls_made:
-                return accumulated_text + response_text, messages
+    async def _process_claude_response(
+        self, activation, response, current_messages, tools, speculation=None
+    ):
+        """
+        Run the agent loop: execute requested tools and call Claude again until it answers.
+
+        The loop is bounded by AGENT_MAX_STEPS model calls, the cumulative
+        token budgets and the AGENT_DEADLINE_SECONDS wall-clock deadline
+        (measured from activation start). Budgets are checked before and after
+        each tool batch, and every model call in the loop is cut off at the
+        deadline minus FINAL_ANSWER_RESERVE_SECONDS. When a budget runs out,
+        Claude is called one last time with tools disabled for a short final
+        answer, itself limited to FINAL_ANSWER_TIMEOUT_SECONDS.
+
+        Args:
+            activation: Metrics dict of the activation; its budgets are enforced
+            response: Claude's first response
+            current_messages: Message history that produced it (extended in place)
+            tools: Tool definitions
+            speculation: Optional SpeculativeSearch started with the first call
+
+        Returns:
+            The text of all assistant turns
+        """
+        messages = current_messages
+        started = activation["started_perf"]
+        deadline = started + AGENT_DEADLINE_SECONDS
+        model_calls = 1
+        answer_parts = []
+
+        while True:
+            # Text was already spoken while it streamed in
+            answer_parts.append(
+                "".join(block.text for block in response.content if block.type == "text")
+            )
+            tool_blocks = [block for block in response.content if block.type == "tool_use"]
+            messages.append(
+                {"role": "assistant", "content": _assistant_content(response.content)}
+            )
+
+            if not tool_blocks:
+                activation["stop_reason"] = "answered"
+                break
 
             # --- Handle Tool Calls ---
             print("Agent requested tool usage...")
             if self.callback_status_update:
                 self.callback_status_update("Agent Using Tools...", "blue")
 
-            tool_results_content = []
-
-            # Process the tools silently without announcing them
-            for content_block in response.content:
-                if content_block.type == "tool_use":
-                    tool_name = content_block.name
-                    tool_input = content_block.input
-                    tool_call_id = content_block.id
-
-                    # Execute the tool
-                    print(f"Executing tool: {tool_name} with input: {tool_input}")
-                    tool_result = self.tool_manager.execute_tool(tool_name, tool_input)
-                    print(f"Tool result: {tool_result}")
-
-                    # Append tool result for the next API call
-                    tool_results_content.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": tool_call_id,
-                            "content": tool_result,  # The result is already a JSON string
-                        }
+            exhausted = self._exhausted_budget(activation, model_calls, deadline)
+            if exhausted:
+                # No room for another step, so the batch is not run; every
+                # tool_use still needs a tool_result for the final call
+                tool_results_content = [
+                    {
+                        "type": "tool_result",
+                        "tool_use_id": block.id,
+                        "content": json.dumps(
+                            {"success": False, "message": f"{block.name} was not run ({exhausted} reached)"}
+                        ),
+                        "is_error": True,
+                    }
+                    for block in tool_blocks
+                ]
+            else:
+                # Process the tools silently without announcing them; all calls in a
+                # turn are independent, so they run concurrently
+                tool_results_content = await self._execute_tools(
+                    tool_blocks,
+                    activation=activation,
+                    deadline=deadline - FINAL_ANSWER_RESERVE_SECONDS,
+                    speculation=speculation,
+                )
+                exhausted = self._exhausted_budget(activation, model_calls, deadline)
+            messages.append({"role": "user", "content": tool_results_content})
+
+            if not exhausted:
+                # Call Claude again with the tool results
+                print("Calling Claude again with tool results...")
+                try:
+                    response = await self._stream_claude_response(
+                        activation,
+                        model="claude-3-5-haiku-20241022",
+                        max_tokens=self._remaining_output_tokens(activation, 1024),
+                        system=self.system_blocks,
+                        messages=messages,
+                        tools=tools,
+                        timeout=self._model_call_timeout(deadline),
                     )
+                except asyncio.TimeoutError:
+                    exhausted = "deadline"
+                else:
+                    model_calls += 1
+                    self._log_response(response, "Claude Follow-up Response")
+                    continue
 
-            # Add the tool results message to the history
-            messages.append({"role": "user", "content": tool_results_content})
+            print(f"Agent budget exhausted ({exhausted}); forcing a final answer")
+            activation["stop_reason"] = exhausted
+            answer_parts.append(await self._force_final_answer(activation, messages, tools))
+            break
+
+        activation["answer_seconds"] = time.perf_counter() - started
+
+        # Wait for any final speech to complete before returning
+        await asyncio.to_thread(self._wait_for_speech)
+
+        return " ".join(part.strip() for part in answer_parts if part.strip())
+
+    def _exhausted_budget(self, activation, model_calls, deadline):
+        """Return which of the activation's budgets prevents another full agent step, or None"""
+        if model_calls >= AGENT_MAX_STEPS:
+            return "max steps"
+        if activation["prompt_tokens"] >= AGENT_MAX_INPUT_TOKENS:
+            return "input token budget"
+        if activation["output_tokens"] >= AGENT_MAX_OUTPUT_TOKENS:
+            return "output token budget"
+        if time.perf_counter() >= deadline - FINAL_ANSWER_RESERVE_SECONDS:
+            return "deadline"
+        return None
 
-            # Only continue recursion if search_knowledge was called
-            if not search_knowledge_called:
-                print("Non-search_knowledge tool used, stopping recursion")
-                return accumulated_text + response_text, messages
+    def _model_call_timeout(self, deadline):
+        """Seconds a loop model call may take, leaving the final-answer reserve before the deadline"""
+        return max(1.0, deadline - FINAL_ANSWER_RESERVE_SECONDS - time.perf_counter())
+
+    def _remaining_output_tokens(self, activation, requested):
+        """Cap a call's max_tokens by what is left of the activation's output budget"""
+        return max(1, min(requested, AGENT_MAX_OUTPUT_TOKENS - activation["output_tokens"]))
+
+    async def _force_final_answer(self, activation, messages, tools):
+        """
+        Ask Claude for a short answer from what it has so far, with tool use disabled.
 
-            # Call Claude again with the tool results
-            print("Calling Claude again with tool results...")
-            follow_up_response = self.anthropic_client.messages.create(
+        Returns:
+            The answer text, or DEADLINE_FALLBACK_ANSWER (also spoken) if the call failed
+        """
+        # Added to the pending tool results so user and assistant turns still alternate
+        messages[-1]["content"].append(
+            {
+                "type": "text",
+                "text": "You are out of time for further tool use. Give your final answer to the team now, based on what you already know.",
+            }
+        )
+        try:
+            response = await self._stream_claude_response(
+                activation,
                 model="claude-3-5-haiku-20241022",
-                max_tokens=1024,
-                system=self.system_prompt,
-                messages=[msg for msg in messages if msg["role"] != "system"],
+                max_tokens=FINAL_ANSWER_MAX_TOKENS,
+                system=self.system_blocks,
+                messages=messages,
                 tools=tools,
+                tool_choice={"type": "none"},
+                timeout=FINAL_ANSWER_TIMEOUT_SECONDS,
             )
+        except Exception as e:
+            print(f"Forced final answer failed: {e}")
+            # Say something rather than leave the team waiting in silence
+            self._queue_sentence(DEADLINE_FALLBACK_ANSWER, activation)
+            return DEADLINE_FALLBACK_ANSWER
+        if activation["steps"]:
+            activation["steps"][-1]["kind"] = "final"
+        self._log_response(response, "Claude Final Response")
+        messages.append({"role": "assistant", "content": _assistant_content(response.content)})
+        return "".join(block.text for block in response.content if block.type == "text")
 
-            # --- Log Claude Follow-up Response ---
-            print("--- Claude Follow-up Response ---")
-            try:
-                print(follow_up_response.model_dump_json(indent=2))
-            except AttributeError:  # Fallback if model_dump_json doesn't exist
-                print(str(follow_up_response))
-            print("-------------------------------")
+    def _log_response(self, response, label):
+        print(f"--- {label} ---")
+        try:
+            print(response.model_dump_json(indent=2))
+        except AttributeError:  # Fallback if model_dump_json doesn't exist
+            print(str(response))
+        print("-" * (len(label) + 8))
 
-            # Recursively process the follow-up response to handle any additional tool calls
-            return process_response(follow_up_response, messages, accumulated_text)
+    async def _stream_claude_response(self, activation, **request):
+        """
+        Call Claude with streaming, queueing each completed sentence for speech.
 
-        # Start the recursive processing with the initial response
-        final_text, _ = process_response(response, current_messages)
+        Args:
+            activation: Metrics dict of the activation the call belongs to, or None
+            **request: Arguments for messages.stream (model, messages, tools, ...).
+                A timeout bounds the whole call, not just each network read.
 
-        # Wait for any final speech to complete before returning
-        if self.active_speech_thread and self.active_speech_thread.is_alive():
-            self.active_speech_thread.join()
+        Returns:
+            The final Message, as messages.create would have returned it
+
+        Raises:
+            asyncio.TimeoutError: If the call took longer than request["timeout"]
+        """
+        splitter = SentenceSplitter()
+        call_started = time.perf_counter()
+        first_token_seconds = None
+
+        async def consume_stream():
+            nonlocal first_token_seconds
+            async with self.async_anthropic_client.messages.stream(**request) as stream:
+                async for text in stream.text_stream:
+                    if first_token_seconds is None:
+                        first_token_seconds = time.perf_counter() - call_started
+                    for sentence in splitter.feed(text):
+                        self._queue_sentence(sentence, activation)
+                remainder = splitter.flush()
+                if remainder:
+                    self._queue_sentence(remainder, activation)
+                return await stream.get_final_message()
+
+        timeout = request.get("timeout")
+        try:
+            response = await asyncio.wait_for(consume_stream(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Claude call timed out after {timeout:.1f}s")
+            raise
+
+        if activation is not None and activation["first_token_seconds"] is None:
+            if first_token_seconds is not None:
+                activation["first_token_seconds"] = (
+                    call_started - activation["started_perf"] + first_token_seconds
+                )
+        self._record_usage(activation, response, time.perf_counter() - call_started)
+        return response
 
-        return final_text.strip()
+    def _queue_sentence(self, sentence, activation=None):
+        """Hand one sentence to the synthesis thread"""
+        if sentence:
+            self.sentence_queue.put((sentence, activation))
+
+    def _wait_for_speech(self):
+        """Block until every queued sentence has been synthesized and played"""
+        self.sentence_queue.join()
+        self.audio_queue.join()
 
     def _generate_and_play_speech_async(self, text):
-        """Generate speech from text and play it in a background thread, waiting for any previous speech to finish"""
-        with self.speech_lock:
-            # Wait for any active speech thread to complete first
-            if self.active_speech_thread and self.active_speech_thread.is_alive():
-                print("Waiting for previous speech to complete")
-                self.active_speech_thread.join()
-
-            # Create and start a new thread
-            thread = threading.Thread(target=self._speech_worker, args=(text,))
-            thread.daemon = (
-                True  # Make thread a daemon so it doesn't block program exit
-            )
-            thread.start()
-            self.active_speech_thread = thread
+        """Queue text for speech; it plays after anything already queued"""
+        splitter = SentenceSplitter()
+        for sentence in splitter.feed(text):
+            self._queue_sentence(sentence, self.current_activation)
+        self._queue_sentence(splitter.flush(), self.current_activation)
+
+    def stop_speaking(self):
+        """Stop the current utterance immediately and drop any queued speech"""
+        self.audio_player.stop()
+        while True:
+            try:
+                self.sentence_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.sentence_queue.task_done()
+
+    def _synthesis_loop(self):
+        """
+        Stream audio for queued sentences, staying at most MAX_PENDING_AUDIO ahead of playback.
+
+        Each utterance is handed to playback before its first chunk arrives, so
+        playback starts as soon as audio does while this thread keeps reading.
+        """
+        while True:
+            sentence, activation = self.sentence_queue.get()
+            if not self.elevenlabs_client:
+                print(f"Agent response (text only): {sentence}")
+                self.sentence_queue.task_done()
+                continue
+            generation = self.audio_player.generation
+            chunks = queue.Queue()
+            try:
+                self.audio_queue.put((sentence, chunks, activation, generation))
+                for chunk in self._synthesize_stream(sentence):
+                    if generation != self.audio_player.generation:
+                        break  # Stopped; don't download the rest
+                    chunks.put(chunk)
+            except Exception as e:
+                print(f"Speech generation error: {e}")
+                print(f"Agent response: {sentence}")
+            finally:
+                chunks.put(None)
+                self.sentence_queue.task_done()
+
+    def _playback_loop(self):
+        """Play utterances in order, writing each chunk as soon as it arrives"""
+        while True:
+            sentence, chunks, activation, generation = self.audio_queue.get()
+            try:
+                self.audio_player.play_chunks(
+                    self._iter_chunks(chunks, activation), generation
+                )
+            except Exception as e:
+                print(f"Speech playback error: {e}")
+                print(f"Agent response: {sentence}")
+            finally:
+                self.audio_queue.task_done()
+
+    def _iter_chunks(self, chunks, activation):
+        """Yield chunks from a synthesis queue, recording when the activation's first audio arrived"""
+        for chunk in iter(chunks.get, None):
+            if activation is not None and activation["first_audio_seconds"] is None:
+                activation["first_audio_seconds"] = (
+                    time.perf_counter() - activation["started_perf"]
+                )
+            yield chunk
+
+    def _synthesize_stream(self, text):
+        """Request speech for text, returning an iterator of raw PCM chunks as they arrive"""
+        return self.elevenlabs_client.text_to_speech.convert(
+            text=text,
+            voice_id=self.voice_id,
+            model_id="eleven_multilingual_v2",
+            output_format=TTS_OUTPUT_FORMAT,
+        )
 
     def _speech_worker(self, text):
-        """Worker function that runs in a background thread to generate and play speech"""
+        """Generate speech for text and play it as it streams in"""
         if not self.elevenlabs_client:
             print("ElevenLabs client not initialized. Skipping speech generation.")
             print(f"Agent response (text only): {text}")
             return
 
         try:
-            # Generate audio using the client's method
-            audio = self.elevenlabs_client.text_to_speech.convert(
-                text=text,
-                voice_id=self.voice_id,
-                model_id="eleven_multilingual_v2",
-            )
-
-            # Play the audio
-            play(audio)
+            self.audio_player.play_chunks(self._synthesize_stream(text))
 
         except Exception as e:
             print(f"Speech generation error: {e}")
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+# One event loop, on one daemon thread, runs all async agent work for the process
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared event loop, starting its thread on first use."""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever, name="agent-event-loop", daemon=True
+            )
+            _loop_thread.start()
+        return _loop
+
+
+def submit(coro: Coroutine) -> Future:
+    """
+    Schedule a coroutine on the shared loop from any thread (e.g. the Tk main thread).
+
+    Returns:
+        A concurrent.futures.Future for the coroutine's result
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+def run_sync(coro: Coroutine) -> Any:
+    """
+    Run a coroutine on the shared loop and block until it finishes.
+
+    Used by the synchronous wrappers; must not be called from the loop thread itself.
+    """
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_sync called from the event loop thread; await the coroutine instead")
+    return submit(coro).result()
@@ -0,0 +1,115 @@
+import threading
+from typing import Iterable
+
+import pyaudio
+
+# Raw 16-bit mono PCM needs no decoding before it is written to the device
+TTS_OUTPUT_FORMAT = "pcm_22050"
+TTS_SAMPLE_RATE = 22050
+SAMPLE_WIDTH = 2  # Bytes per 16-bit sample
+# Audio held back before the first write of an utterance, to ride out network jitter
+JITTER_BUFFER_SECONDS = 0.1
+# Largest block written at once; bounds how long stop() can take to act
+WRITE_BLOCK_SECONDS = 0.05
+
+
+class StreamingAudioPlayer:
+    """Plays PCM chunks as they arrive on an output stream kept open between utterances"""
+
+    def __init__(
+        self,
+        sample_rate: int = TTS_SAMPLE_RATE,
+        jitter_buffer_seconds: float = JITTER_BUFFER_SECONDS,
+    ):
+        """
+        Initialize the player. The output device is opened on first use.
+
+        Args:
+            sample_rate: Sample rate of the PCM audio
+            jitter_buffer_seconds: Audio buffered before playback of each utterance starts
+        """
+        self.sample_rate = sample_rate
+        self.jitter_bytes = _align(int(sample_rate * jitter_buffer_seconds) * SAMPLE_WIDTH)
+        self.block_bytes = _align(int(sample_rate * WRITE_BLOCK_SECONDS) * SAMPLE_WIDTH)
+        self.lock = threading.Lock()
+        self.audio = None
+        self.stream = None
+        # Bumped by stop(); playback started under an older generation ends at once
+        self.generation = 0
+
+    def _ensure_stream(self):
+        if self.stream is None:
+            self.audio = pyaudio.PyAudio()
+            self.stream = self.audio.open(
+                format=pyaudio.paInt16,
+                channels=1,
+                rate=self.sample_rate,
+                output=True,
+            )
+        return self.stream
+
+    def play_chunks(self, chunks: Iterable[bytes], generation: int = None) -> bool:
+        """
+        Write audio chunks to the output device as they arrive.
+
+        Args:
+            chunks: Iterable of raw PCM byte chunks (e.g. a TTS response stream)
+            generation: Value of self.generation when the utterance was queued;
+                defaults to the current one
+
+        Returns:
+            True if the utterance played to the end, False if stop() interrupted it
+        """
+        if generation is None:
+            generation = self.generation
+        pending = b""
+        started = False
+        with self.lock:
+            for chunk in chunks:
+                if generation != self.generation:
+                    return False
+                pending += chunk
+                if not started and len(pending) < self.jitter_bytes:
+                    continue
+                started = True
+                pending = self._write_blocks(pending, generation)
+                if pending is None:
+                    return False
+            if generation != self.generation:
+                return False
+            # Write the tail, dropping a trailing half sample if the stream ended on one
+            pending = self._write_blocks(pending[: _align(len(pending))], generation, flush=True)
+            return pending is not None
+
+    def _write_blocks(self, data: bytes, generation: int, flush: bool = False):
+        """Write whole blocks of data, returning the unwritten remainder (None if stopped)."""
+        stream = self._ensure_stream()
+        position = 0
+        while len(data) - position >= self.block_bytes or (flush and position < len(data)):
+            if generation != self.generation:
+                return None
+            block = data[position : position + self.block_bytes]
+            stream.write(block)
+            position += len(block)
+        return data[position:]
+
+    def stop(self) -> None:
+        """Interrupt the current utterance and any queued under the current generation."""
+        self.generation += 1
+
+    def close(self) -> None:
+        """Stop playback and release the output device."""
+        self.stop()
+        with self.lock:
+            if self.stream is not None:
+                self.stream.stop_stream()
+                self.stream.close()
+                self.stream = None
+            if self.audio is not None:
+                self.audio.terminate()
+                self.audio = None
+
+
+def _align(size: int) -> int:
+    """Round a byte count down to whole samples."""
+    return size - size % SAMPLE_WIDTH
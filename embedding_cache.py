@@ -0,0 +1,150 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Default location of the persistent tier (override with EMBEDDING_CACHE_PATH)
+EMBEDDING_CACHE_PATH = os.environ.get(
+    "EMBEDDING_CACHE_PATH", os.path.join("data", "cache", "embeddings.sqlite3")
+)
+MEMORY_CACHE_SIZE = 512  # Entries kept in the in-memory LRU tier
+DISK_CACHE_SIZE = 20000  # Entries kept on disk before the least recently used are evicted
+
+
+def normalize_text(text: str) -> str:
+    """Normalize query text so trivially different queries share a cache entry."""
+    text = text.casefold()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" .,;:!?\"'")
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + on-disk SQLite) cache of text embeddings"""
+
+    def __init__(
+        self,
+        path: Optional[str] = EMBEDDING_CACHE_PATH,
+        memory_size: int = MEMORY_CACHE_SIZE,
+        disk_size: int = DISK_CACHE_SIZE,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file for the persistent tier, or None for memory only
+            memory_size: Maximum number of entries in the in-memory tier
+            disk_size: Maximum number of entries in the on-disk tier
+        """
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self.db = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self.db = sqlite3.connect(path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    "key TEXT PRIMARY KEY, embedding BLOB NOT NULL, last_used REAL NOT NULL)"
+                )
+                self.db.commit()
+            except Exception as e:
+                print(f"Embedding cache: disk tier disabled ({e})")
+                self.db = None
+
+    @staticmethod
+    def make_key(text: str, model: str) -> str:
+        """Build the cache key from the model name and normalized text."""
+        payload = f"{model}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, text: str, model: str) -> Optional[List[float]]:
+        """
+        Look up an embedding, checking memory first and then disk.
+
+        Returns:
+            The cached embedding, or None on a miss
+        """
+        key = self.make_key(text, model)
+        with self.lock:
+            embedding = self.memory.get(key)
+            if embedding is not None:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return embedding
+
+            if self.db is not None:
+                row = self.db.execute(
+                    "SELECT embedding FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self.db.execute(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+                    self.db.commit()
+                    embedding = array("f", row[0]).tolist()
+                    self._remember(key, embedding)
+                    self.stats["disk_hits"] += 1
+                    return embedding
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, text: str, model: str, embedding: List[float]) -> None:
+        """Store an embedding in both tiers."""
+        key = self.make_key(text, model)
+        with self.lock:
+            self._remember(key, embedding)
+            if self.db is None:
+                return
+            try:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, embedding, last_used) VALUES (?, ?, ?)",
+                    (key, array("f", embedding).tobytes(), time.time()),
+                )
+                self._evict_disk()
+                self.db.commit()
+            except Exception as e:
+                print(f"Embedding cache: failed to persist entry ({e})")
+
+    def _remember(self, key: str, embedding: List[float]) -> None:
+        self.memory[key] = embedding
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        (count,) = self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.disk_size
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+            self.stats["evictions"] += excess
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current tier sizes."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["memory_entries"] = len(self.memory)
+            stats["disk_entries"] = (
+                self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if self.db is not None
+                else 0
+            )
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (
+            (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        )
+        return stats
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# On-disk layout of an embedding store directory:
+#   header.json     - format version, dimension, dtype and committed row count
+#   embeddings.bin  - row-major contiguous matrix of `count` x `dimension` values
+#   metadata.jsonl  - one {"id": ..., "metadata": {...}} line per matrix row
+# The header is written last (atomically) on every change, so rows appended by
+# an interrupted write are ignored on the next open.
+FORMAT_VERSION = 1
+HEADER_FILE = "header.json"
+MATRIX_FILE = "embeddings.bin"
+METADATA_FILE = "metadata.jsonl"
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+class EmbeddingStore:
+    """Appendable, memory-mappable on-disk store of embeddings with id/metadata sidecar"""
+
+    def __init__(self, directory: str):
+        """
+        Open an existing store.
+
+        Args:
+            directory: Directory created by EmbeddingStore.create
+        """
+        self.directory = directory
+        self.lock = threading.Lock()
+        with open(self._path(HEADER_FILE), "r") as f:
+            header = json.load(f)
+        if header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported embedding store version: {header.get('version')}")
+        self.dimension: int = header["dimension"]
+        self.dtype: str = header["dtype"]
+        self.count: int = header["count"]
+
+    @classmethod
+    def create(cls, directory: str, dimension: int, dtype: str = "float32"):
+        """
+        Create an empty store, replacing any existing one in the directory.
+
+        Args:
+            directory: Directory to write the store to
+            dimension: Embedding dimension
+            dtype: "float32", or "float16" to halve the file size
+        """
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"dtype must be one of {SUPPORTED_DTYPES}")
+        os.makedirs(directory, exist_ok=True)
+        open(os.path.join(directory, MATRIX_FILE), "wb").close()
+        open(os.path.join(directory, METADATA_FILE), "w").close()
+        cls._write_header(directory, dimension, dtype, 0)
+        return cls(directory)
+
+    @classmethod
+    def open_or_create(cls, directory: str, dimension: int, dtype: str = "float32"):
+        """Open the store in directory, creating an empty one if none exists."""
+        if os.path.exists(os.path.join(directory, HEADER_FILE)):
+            return cls(directory)
+        return cls.create(directory, dimension, dtype)
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, HEADER_FILE))
+
+    @staticmethod
+    def _write_header(directory: str, dimension: int, dtype: str, count: int) -> None:
+        header_path = os.path.join(directory, HEADER_FILE)
+        tmp_path = header_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"version": FORMAT_VERSION, "dimension": dimension, "dtype": dtype, "count": count},
+                f,
+            )
+        os.replace(tmp_path, header_path)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def append(
+        self,
+        ids: List[str],
+        vectors: Any,
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Append rows to the end of the store.
+
+        If an id is appended again, the later row supersedes the earlier one when read.
+
+        Args:
+            ids: Vector ids
+            vectors: Matrix or list of embeddings, one per id
+            metadata: Metadata dict for each id
+        """
+        if not ids:
+            return
+        matrix = np.asarray(vectors, dtype=self.dtype)
+        if matrix.shape != (len(ids), self.dimension):
+            raise ValueError(
+                f"Expected vectors of shape ({len(ids)}, {self.dimension}), got {matrix.shape}"
+            )
+        metadata = metadata or [{} for _ in ids]
+        with self.lock:
+            # Drop any uncommitted bytes/lines left by an interrupted append
+            self._truncate_to_count()
+            with open(self._path(MATRIX_FILE), "ab") as f:
+                f.write(np.ascontiguousarray(matrix).tobytes())
+            with open(self._path(METADATA_FILE), "a", encoding="utf-8") as f:
+                for vector_id, meta in zip(ids, metadata):
+                    f.write(json.dumps({"id": vector_id, "metadata": meta}) + "\n")
+            self.count += len(ids)
+            self._write_header(self.directory, self.dimension, self.dtype, self.count)
+
+    def _truncate_to_count(self) -> None:
+        row_bytes = self.dimension * np.dtype(self.dtype).itemsize
+        with open(self._path(MATRIX_FILE), "r+b") as f:
+            f.truncate(self.count * row_bytes)
+        lines = self._read_metadata_lines()
+        if len(lines) != self.count:
+            with open(self._path(METADATA_FILE), "w", encoding="utf-8") as f:
+                f.writelines(line + "\n" for line in lines[: self.count])
+
+    def _read_metadata_lines(self) -> List[str]:
+        with open(self._path(METADATA_FILE), "r", encoding="utf-8") as f:
+            return [line.rstrip("\n") for line in f if line.strip()]
+
+    def matrix(self, mmap: bool = True) -> np.ndarray:
+        """
+        Return the committed rows as a (count, dimension) array.
+
+        Args:
+            mmap: Map the file read-only (zero-copy) instead of reading it into memory
+        """
+        if self.count == 0:
+            return np.zeros((0, self.dimension), dtype=self.dtype)
+        if mmap:
+            return np.memmap(
+                self._path(MATRIX_FILE),
+                dtype=self.dtype,
+                mode="r",
+                shape=(self.count, self.dimension),
+            )
+        return np.fromfile(
+            self._path(MATRIX_FILE), dtype=self.dtype, count=self.count * self.dimension
+        ).reshape(self.count, self.dimension)
+
+    def records(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return (id, metadata) for every committed row, in row order."""
+        lines = self._read_metadata_lines()[: self.count]
+        return [(record["id"], record["metadata"]) for record in map(json.loads, lines)]
+
+    def live_rows(self) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+        """Yield (row, id, metadata) for the latest row of each id."""
+        latest: Dict[str, int] = {}
+        records = self.records()
+        for row, (vector_id, _) in enumerate(records):
+            latest[vector_id] = row
+        for vector_id, row in sorted(latest.items(), key=lambda item: item[1]):
+            yield row, vector_id, records[row][1]
+
+    def load(self, mmap: bool = True) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+        """
+        Load the live rows of the store.
+
+        Returns:
+            (ids, matrix, metadata); the matrix is a zero-copy memory map when the
+            store has no superseded rows and mmap is True
+        """
+        rows = list(self.live_rows())
+        matrix = self.matrix(mmap=mmap)
+        ids = [vector_id for _, vector_id, _ in rows]
+        metadata = [meta for _, _, meta in rows]
+        if len(rows) != self.count:
+            matrix = np.asarray(matrix[[row for row, _, _ in rows]])
+        return ids, matrix, metadata
+
+    def rewrite(
+        self,
+        ids: List[str],
+        vectors: Any,
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """Replace the whole store contents, e.g. to compact superseded or deleted rows."""
+        matrix = np.asarray(vectors, dtype=self.dtype).reshape(len(ids), self.dimension)
+        metadata = metadata or [{} for _ in ids]
+        with self.lock:
+            matrix_tmp = self._path(MATRIX_FILE) + ".tmp"
+            metadata_tmp = self._path(METADATA_FILE) + ".tmp"
+            with open(matrix_tmp, "wb") as f:
+                f.write(np.ascontiguousarray(matrix).tobytes())
+            with open(metadata_tmp, "w", encoding="utf-8") as f:
+                for vector_id, meta in zip(ids, metadata):
+                    f.write(json.dumps({"id": vector_id, "metadata": meta}) + "\n")
+            # Zero the header first so a crash mid-swap leaves an empty, consistent store
+            self._write_header(self.directory, self.dimension, self.dtype, 0)
+            os.replace(matrix_tmp, self._path(MATRIX_FILE))
+            os.replace(metadata_tmp, self._path(METADATA_FILE))
+            self.count = len(ids)
+            self._write_header(self.directory, self.dimension, self.dtype, self.count)
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove ids from the store by compacting it."""
+        remove = set(ids)
+        kept_ids, matrix, metadata = self.load(mmap=False)
+        keep = [i for i, vector_id in enumerate(kept_ids) if vector_id not in remove]
+        self.rewrite(
+            [kept_ids[i] for i in keep],
+            matrix[keep],
+            [metadata[i] for i in keep],
+        )
+
+    def compact(self) -> None:
+        """Drop superseded rows so the matrix can again be memory-mapped directly."""
+        ids, matrix, metadata = self.load(mmap=False)
+        self.rewrite(ids, matrix, metadata)
@@ -0,0 +1,324 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.util.retry import Retry
+
+# Connection pool configuration (override via environment variables)
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 10))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 30))
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+
+# Only retry statuses where the server did not act on the request, so a
+# retried POST cannot create a duplicate Jira ticket
+RETRY_STATUS_CODES = (429, 503)
+
+_sessions: Dict[str, requests.Session] = {}
+_stats: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+# Connection counts of the request in flight on this thread (see _CountingAdapter)
+_request_counts = threading.local()
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class _ConnectionCounter:
+    """Connection mixin that counts each request as sent on a new or a reused connection"""
+
+    just_connected = False
+
+    def connect(self):
+        super().connect()
+        self.just_connected = True
+
+    def request(self, *args, **kwargs):
+        # HTTPS connects before the request, plain HTTP during it
+        new = self.just_connected or self.sock is None
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            self.just_connected = False
+            counts = getattr(_request_counts, "counts", None)
+            if counts is not None:
+                counts["new_connections" if new else "reused_connections"] += 1
+
+
+class _CountingHTTPConnection(_ConnectionCounter, HTTPConnection):
+    pass
+
+
+class _CountingHTTPSConnection(_ConnectionCounter, HTTPSConnection):
+    pass
+
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that records, per request, how many connections were opened or reused.
+
+    Counts are kept per thread, so overlapping requests to the same host are
+    attributed correctly; retries of one request add to its counts.
+    """
+
+    def get_connection_with_tls_context(self, *args, **kwargs):
+        return self._counting(super().get_connection_with_tls_context(*args, **kwargs))
+
+    def get_connection(self, *args, **kwargs):
+        # Used instead of the above by requests < 2.32.2
+        return self._counting(super().get_connection(*args, **kwargs))
+
+    @staticmethod
+    def _counting(pool):
+        if not issubclass(pool.ConnectionCls, _ConnectionCounter):
+            https = issubclass(pool.ConnectionCls, HTTPSConnection)
+            pool.ConnectionCls = _CountingHTTPSConnection if https else _CountingHTTPConnection
+        return pool
+
+    def send(self, request, *args, **kwargs):
+        _request_counts.counts = {"new_connections": 0, "reused_connections": 0}
+        try:
+            return super().send(request, *args, **kwargs)
+        finally:
+            counts = _request_counts.counts
+            _request_counts.counts = None
+            with _lock:
+                stats = _stats.get(_host_key(request.url))
+                if stats is not None:
+                    stats["new_connections"] += counts["new_connections"]
+                    stats["reused_connections"] += counts["reused_connections"]
+
+
+def _build_session() -> requests.Session:
+    """Create a session with a keep-alive connection pool and retry/backoff."""
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=0,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=None,  # Retry any verb on the statuses above
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    # One host per session, so a single pool of HTTP_POOL_MAXSIZE connections
+    adapter = _CountingAdapter(
+        pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Return the shared session for the host of the given URL.
+
+    Args:
+        url: Any URL on the target host
+
+    Returns:
+        A requests.Session whose connections are reused across calls
+    """
+    host = _host_key(url)
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _build_session()
+            _sessions[host] = session
+            _stats[host] = {
+                "requests": 0,
+                "errors": 0,
+                "new_connections": 0,
+                "reused_connections": 0,
+                "total_latency": 0.0,
+                "max_latency": 0.0,
+            }
+        return session
+
+
+def request(self, *args, **kwargs):
+        # HTTPS connects before the request, plain HTTP during it
+        new = self.just_connected or self.sock is None
+        try:
+            return super().request(*args, **kwargs)
+        finally:
+            self.just_connected = False
+            counts = getattr(_request_counts, "counts", None)
+            if counts is not None:
+                counts["new_connections" if new else "reused_connections"] += 1
+
+
+class _CountingHTTPConnection(_ConnectionCounter, HTTPConnection):
+    pass
+
+
+class _CountingHTTPSConnection(_ConnectionCounter, HTTPSConnection):
+    pass
+
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that records, per request, how many connections were opened or reused.
+
+    Counts are kept per thread, so overlapping requests to the same host are
+    attributed correctly; retries of one request add to its counts.
+    """
+
+    def get_connection_with_tls_context(self, *args, **kwargs):
+        return self._counting(super().get_connection_with_tls_context(*args, **kwargs))
+
+    def get_connection(self, *args, **kwargs):
+        # Used instead of the above by requests < 2.32.2
+        return self._counting(super().get_connection(*args, **kwargs))
+
+    @staticmethod
+    def _counting(pool):
+        if not issubclass(pool.ConnectionCls, _ConnectionCounter):
+            https = issubclass(pool.ConnectionCls, HTTPSConnection)
+            pool.ConnectionCls = _CountingHTTPSConnection if https else _CountingHTTPConnection
+        return pool
+
+    def send(self, request, *args, **kwargs):
+        _request_counts.counts = {"new_connections": 0, "reused_connections": 0}
+        try:
+            return super().send(request, *args, **kwargs)
+        finally:
+            counts = _request_counts.counts
+            _request_counts.counts = None
+            with _lock:
+                stats = _stats.get(_host_key(request.url))
+                if stats is not None:
+                    stats["new_connections"] += counts["new_connections"]
+                    stats["reused_connections"] += counts["reused_connections"]
+
+
+def _build_session() -> requests.Session:
+    """Create a session with a keep-alive connection pool and retry/backoff."""
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        connect=HTTP_MAX_RETRIES,
+        read=0,
+        status=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=None,  # Retry any verb on the statuses above
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    # One host per session, so a single pool of HTTP_POOL_MAXSIZE connections
+    adapter = _CountingAdapter(
+        pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """
+    Return the shared session for the host of the given URL.
+
+    Args:
+        url: Any URL on the target host
+
+    Returns:
+        A requests.Session whose connections are reused across calls
+    """
+    host = _host_key(url)
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _build_session()
+            _sessions[host] = session
+            _stats[host] = {
+                "requests": 0,
+                "errors": 0,
+                "new_connections": 0,
+                "reused_connections": 0,
+                "total_latency": 0.0,
+                "max_latency": 0.0,
+            }
+        return session
+
+
+def _connection_counts(session: requests.Session, url: str):
+    """Read (connections opened, requests sent) from the host's urllib3 pools."""
+    try:
+        pools = session.get_adapter(url).poolmanager.pools
+        # Sessions are per host, so every pool in the adapter belongs to this host
+        with pools.lock:
+            host_pools = list(pools._container.values())
+        return (
+            sum(pool.num_connections for pool in host_pools),
+            sum(pool.num_requests for pool in host_pools),
+        )
+    except Exception:
+        return None
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a request through the pooled session for the URL's host.
+
+    Accepts the same keyword arguments as requests.request. A default timeout
+    of HTTP_TIMEOUT seconds is applied if none is given.
+
+    Returns:
+        The requests.Response
+    """
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    host = _host_key(url)
+    session = get_session(url)
+
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, **kwargs)
+    except Exception:
+        with _lock:
+            _stats[host]["errors"] += 1
+        raise
+    latency = time.perf_counter() - start
+
+    with _lock:
+        stats = _stats[host]
+        stats["requests"] += 1
+        stats["total_latency"] += latency
+        stats["max_latency"] = max(stats["max_latency"], latency)
+    return response
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """Send a POST request through the pooled session."""
+    return request("POST", url, **kwargs)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Send a GET request through the pooled session."""
+    return request("GET", url, **kwargs)
+
+
+def get_http_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Return per-host counters for connection reuse and request latency.
+
+    Returns:
+        Dict mapping "scheme://host" to its request, connection and latency counters
+    """
+    with _lock:
+        snapshot = {host: dict(stats) for host, stats in _stats.items()}
+    for stats in snapshot.values():
+        stats["avg_latency"] = (
+            stats["total_latency"] / stats["requests"] if stats["requests"] else 0.0
+        )
+    return snapshot
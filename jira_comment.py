@@ -1,9 +1,10 @@
 import os
 
-import requests
 from dotenv import load_dotenv
 from requests.auth import HTTPBasicAuth
 
+import http_client
+
 load_dotenv()
 
 JIRA_DOMAIN: str = os.environ["JIRA_DOMAIN"]
@@ -40,7 +41,7 @@ def add_jira_comment(ticket_key: str, comment: str) -> dict:
     auth = HTTPBasicAuth(JIRA_EMAIL, JIRA_API_TOKEN)
     headers = {"Accept": "application/json", "Content-Type": "application/json"}
 
-    response = requests.post(url, json=payload, headers=headers, auth=auth)
+    response = http_client.post(url, json=payload, headers=headers, auth=auth)
     print("Got response", response.json())
     # response.raise_for_status()
 
@@ -1,10 +1,11 @@
 import os
 from datetime import datetime
 
-import requests
 from dotenv import load_dotenv
 from requests.auth import HTTPBasicAuth
 
+import http_client
+
 load_dotenv()
 
 JIRA_DOMAIN: str = os.environ["JIRA_DOMAIN"]
@@ -70,7 +71,7 @@ def create_jira_ticket(
     auth = HTTPBasicAuth(JIRA_EMAIL, JIRA_API_TOKEN)
     headers = {"Accept": "application/json", "Content-Type": "application/json"}
 
-    response = requests.post(url, json=payload, headers=headers, auth=auth)
+    response = http_client.post(url, json=payload, headers=headers, auth=auth)
     print("Create ticket response:", response.status_code)
 
     if response.status_code == 201:
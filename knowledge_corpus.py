@@ -0,0 +1,145 @@
+import re
+from datetime import datetime
+from typing import Any, Dict, List
+
+from transcript_chunking import chunk_meeting
+
+MEETING_TRANSCRIPTS_PATH = "data/meeting_transcripts.txt"
+JIRA_TICKETS_PATH = "data/jira_tickets.json"
+# Written by the ingestion script after every index update
+INGESTION_MANIFEST_PATH = "data/ingestion_manifest.json"
+
+# Regex captures meeting number and date string
+MEETING_HEADER_PATTERN = re.compile(r"### Meeting (\d+): (.*?)\n")
+
+
+def build_meeting_items(content: str) -> List[Dict[str, Any]]:
+    """
+    Split the meeting transcripts file into indexable items.
+
+    Each meeting is split into overlapping speaker-turn windows; every window
+    becomes one item with id "meeting-N-chunk-I".
+
+    Args:
+        content: Contents of meeting_transcripts.txt
+
+    Returns:
+        List of items with "id", "text" (the text to embed/index) and "metadata"
+    """
+    meeting_headers = list(MEETING_HEADER_PATTERN.finditer(content))
+    items = []
+
+    for i, header_match in enumerate(meeting_headers):
+        meeting_number = int(header_match.group(1))
+        date_str = header_match.group(2).strip()
+
+        # Extract meeting content
+        start_index = header_match.end()
+        end_index = meeting_headers[i + 1].start() if i + 1 < len(meeting_headers) else len(content)
+        meeting_text = content[start_index:end_index].strip()
+
+        if not meeting_text:
+            print(f"Warning: Meeting {meeting_number} has no content. Skipping.")
+            continue
+
+        # Parse date string
+        try:
+            # Assuming format "Month Day, Year" e.g., "February 15, 2025"
+            meeting_date_obj = datetime.strptime(date_str, "%B %d, %Y")
+            meeting_date_iso = meeting_date_obj.strftime("%Y-%m-%d")
+        except ValueError:
+            print(f"Warning: Could not parse date '{date_str}' for meeting {meeting_number}. Skipping date metadata.")
+            meeting_date_iso = None
+
+        # Embed each window separately so search can return just the relevant span
+        meeting_id = f"meeting-{meeting_number}"
+        for chunk in chunk_meeting(meeting_text):
+            # Offsets index into the meeting's text in meeting_map.json
+            metadata = {
+                "source": "meeting_transcript",
+                "meeting_number": meeting_number,
+                "meeting_id": meeting_id,
+                "chunk_index": chunk["chunk_index"],
+                "start_char": chunk["start_char"],
+                "end_char": chunk["end_char"],
+                "speakers": chunk["speakers"],
+                "text": chunk["text"],
+                "text_snippet": chunk["text"][:200] + "...",  # Add a snippet for context
+            }
+            if meeting_date_iso:
+                metadata["meeting_date"] = meeting_date_iso
+
+            items.append(
+                {
+                    "id": f"{meeting_id}-chunk-{chunk['chunk_index']}",
+                    "text": chunk["text"],
+                    "metadata": metadata,
+                }
+            )
+
+    return items
+
+
+def build_jira_items(tickets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert Jira tickets into indexable items with id "jira-<KEY>".
+
+    Args:
+        tickets: Parsed contents of jira_tickets.json
+
+    Returns:
+        List of items with "id", "text" (the text to embed/index) and "metadata"
+    """
+    items = []
+    for ticket in tickets:
+        try:
+            ticket_id = ticket.get("key")
+            fields = ticket.get("fields", {})
+            summary = fields.get("summary", "")
+            description = fields.get("description", "")
+            status = fields.get("status", {}).get("name")
+            assignee = fields.get("assignee", {}).get("displayName")
+            reporter = fields.get("reporter", {}).get("displayName")
+            created_str = fields.get("created")  # e.g., "2025-02-10T10:23:54.000+0000"
+            labels = fields.get("labels", [])
+
+            if not ticket_id or not (summary or description):
+                print(f"Warning: Skipping ticket due to missing ID, summary, or description: {ticket.get('id')}")
+                continue
+
+            # Combine relevant text fields for embedding
+            text_to_embed = f"Summary: {summary}\nDescription: {description}"
+            if labels:
+                text_to_embed += f"\nLabels: {', '.join(labels)}"
+
+            # Parse created date
+            created_date_iso = None
+            if created_str:
+                try:
+                    # Parse ISO 8601 format, ignoring timezone for simplicity here
+                    created_date_obj = datetime.fromisoformat(created_str.split(".")[0])  # Remove fractional seconds
+                    created_date_iso = created_date_obj.strftime("%Y-%m-%d")
+                except ValueError:
+                    print(f"Warning: Could not parse date '{created_str}' for ticket {ticket_id}. Skipping date metadata.")
+
+            # Prepare metadata
+            metadata = {
+                "source": "jira_ticket",
+                "ticket_id": ticket_id,
+                "summary": summary,
+                "status": status,
+                "assignee": assignee,
+                "reporter": reporter,
+                "labels": labels,
+                "text_snippet": text_to_embed[:200] + "...",
+            }
+            if created_date_iso:
+                metadata["created_date"] = created_date_iso
+
+            items.append({"id": f"jira-{ticket_id}", "text": text_to_embed, "metadata": metadata})
+
+        except Exception as e:
+            print(f"Error processing ticket {ticket.get('id', 'UNKNOWN')}: {e}")
+            continue  # Skip to the next ticket
+
+    return items
@@ -1,26 +1,74 @@
+import asyncio
 import json
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Union
 
 import pinecone
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from pinecone import Pinecone
 
+from embedding_cache import EmbeddingCache
+from embedding_store import HEADER_FILE
+from knowledge_corpus import INGESTION_MANIFEST_PATH, JIRA_TICKETS_PATH, MEETING_TRANSCRIPTS_PATH
+from lexical_index import get_lexical_index, reciprocal_rank_fusion
+from meeting_store import MEETING_MAP_PATH, get_meeting_store
+from result_packer import COMPACT_SEPARATORS, SEARCH_RESULT_TOKEN_BUDGET, pack_search_results
+from search_cache import SearchResultCache
+from vector_store import LOCAL_VECTOR_STORE_PATH, LocalVectorStore, VectorStore
+
 load_dotenv()
 
-PINECONE_API_KEY = os.environ["PINECONE_API_KEY"]
-PINECONE_ENVIRONMENT = os.environ["PINECONE_ENVIRONMENT"]
-PINECONE_INDEX_HOST = os.environ["PINECONE_INDEX_HOST"]
+# Pinecone settings are only required when the "pinecone" backend is used
+PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", "")
+PINECONE_ENVIRONMENT = os.environ.get("PINECONE_ENVIRONMENT", "")
+PINECONE_INDEX_HOST = os.environ.get("PINECONE_INDEX_HOST", "")
+# Vector store backend: "pinecone" (remote index) or "local" (in-process NumPy index)
+VECTOR_STORE_BACKEND = os.environ.get("VECTOR_STORE_BACKEND", "pinecone")
 OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
 
-# Path to the meeting map JSON file
-MEETING_MAP_PATH = os.path.join("data", "meeting_map.json")
-
 openai_client = OpenAI()
+# Created on first use, inside the event loop that will await it
+_async_openai_client = None
+
+# Query embeddings are cached so repeated searches skip the OpenAI call
+embedding_cache = EmbeddingCache()
+
+# Packed search results, dropped when the ingestion script or data files change
+search_result_cache = SearchResultCache(
+    watch_paths=(
+        INGESTION_MANIFEST_PATH,
+        MEETING_TRANSCRIPTS_PATH,
+        JIRA_TICKETS_PATH,
+        MEETING_MAP_PATH,
+        os.path.join(LOCAL_VECTOR_STORE_PATH, HEADER_FILE),
+    )
+)
+
+# Source types stored in the index; each is searched with its own top_k
+KNOWLEDGE_SOURCES = ["jira_ticket", "meeting_transcript"]
+
+# Shared pool for running the per-source queries concurrently
+_search_executor = ThreadPoolExecutor(
+    max_workers=len(KNOWLEDGE_SOURCES), thread_name_prefix="knowledge-search"
+)
 
+# Process-wide Pinecone client, built lazily on first search and shared afterwards
+_pinecone_client = None
+_pinecone_client_lock = threading.Lock()
 
-class PineconeClient:
+# Process-wide local vector store, loaded lazily when that backend is selected
+# and reloaded when ingestion rewrites its header
+_local_vector_store = None
+_local_vector_store_mtime = None
+_local_vector_store_lock = threading.Lock()
+
+
+class PineconeClient(VectorStore):
     def __init__(
         self,
         api_key: str,
@@ -47,6 +95,20 @@ class PineconeClient:
         pc = Pinecone(api_key=self.api_key, environment=self.environment)
         self.index = pc.Index(host=self.index_host)
 
+    def health_check(self) -> bool:
+        """
+        Check that the index is reachable.
+
+        Returns:
+            True if the index answered a stats request, False otherwise
+        """
+        try:
+            self.index.describe_index_stats()
+            return True
+        except Exception as e:
+            print(f"Pinecone health check failed: {e}")
+            return False
+
     def search(
         self,
         query_vector: List[float],
@@ -107,6 +169,53 @@ class PineconeClient:
             }
 
 
+def get_pinecone_client(
+    api_key: str = PINECONE_API_KEY,
+    environment: str = PINECONE_ENVIRONMENT,
+    index_host: str = PINECONE_INDEX_HOST,
+    reconnect: bool = False,
+) -> PineconeClient:
+    """
+    Return the shared Pinecone client, creating it on first use.
+
+    Args:
+        api_key: Pinecone API key
+        environment: Pinecone environment
+        index_host: Host of the Pinecone index to query
+        reconnect: Rebuild the client even if one already exists
+
+    Returns:
+        The process-wide PineconeClient
+    """
+    global _pinecone_client
+    with _pinecone_client_lock:
+        config = (api_key, environment, index_host)
+        if (
+            reconnect
+            or _pinecone_client is None
+            or (
+                _pinecone_client.api_key,
+                _pinecone_client.environment,
+                _pinecone_client.index_host,
+            )
+            != config
+        ):
+            _pinecone_client = PineconeClient(api_key, environment, index_host)
+        return _pinecone_client
+
+
+def check_pinecone_health() -> bool:
+    """
+    Health check the shared client, reconnecting once if it is unreachable.
+
+    Returns:
+        True if the index is reachable
+    """
+    if get_pinecone_client().health_check():
+        return True
+    return get_pinecone_client(reconnect=True).health_check()
+
+
 def search_pinecone(
     query_vector: List[float],
     api_key: str,
@@ -135,7 +244,7 @@ def search_pinecone(
     Returns:
         Dict containing search results with matches, including vector content and metadata if requested
     """
-    client = PineconeClient(api_key, environment, index_host)
+    client = get_pinecone_client(api_key, environment, index_host)
     return client.search(
         query_vector=query_vector,
         top_k=top_k,
@@ -146,19 +255,173 @@ def search_pinecone(
     )
 
 
+def get_async_openai_client() -> AsyncOpenAI:
+    """Return the shared async OpenAI client, creating it on first use."""
+    global _async_openai_client
+    if _async_openai_client is None:
+        _async_openai_client = AsyncOpenAI()
+    return _async_openai_client
+
+
+def get_local_vector_store(path: str = LOCAL_VECTOR_STORE_PATH) -> LocalVectorStore:
+    """
+    Return the shared local vector store, reloading it when the store on disk changes.
+
+    The header is written last on every change to the store, so its
+    modification time marks a new version.
+
+    Args:
+        path: Directory the local index was saved to
+
+    Returns:
+        The process-wide LocalVectorStore (empty if nothing has been saved yet)
+    """
+    global _local_vector_store, _local_vector_store_mtime
+    header_path = os.path.join(path, HEADER_FILE)
+    mtime = os.path.getmtime(header_path) if os.path.exists(header_path) else None
+    with _local_vector_store_lock:
+        if _local_vector_store is None or mtime != _local_vector_store_mtime:
+            try:
+                _local_vector_store = LocalVectorStore.load(path)
+            except FileNotFoundError:
+                print(f"Local vector store not found at {path}; starting empty.")
+                _local_vector_store = LocalVectorStore()
+            _local_vector_store_mtime = mtime
+        return _local_vector_store
+
+
+def get_vector_store(backend: str = VECTOR_STORE_BACKEND) -> VectorStore:
+    """
+    Return the vector store for the configured backend.
+
+    Args:
+        backend: "pinecone" or "local"
+
+    Returns:
+        A VectorStore implementation
+    """
+    if backend == "local":
+        return get_local_vector_store()
+    if backend == "pinecone":
+        return get_pinecone_client()
+    raise ValueError(f"Unknown vector store backend: {backend}")
+
+
+def search_sources(
+    query_vector: List[float],
+    sources: List[str] = KNOWLEDGE_SOURCES,
+    top_k: int = 5,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Search several source types at the same time with one query vector.
+
+    Each source gets its own filtered query so top_k is guaranteed per source;
+    the queries run concurrently so total latency is that of the slowest one.
+
+    Args:
+        query_vector: The query vector to search for (list of floats)
+        sources: Values of the "source" metadata field to search
+        top_k: Number of results to return for each source
+
+    Returns:
+        Dict mapping each source to its vector store search result
+    """
+    store = get_vector_store()
+    if isinstance(store, LocalVectorStore):
+        # Local searches take microseconds; a thread hop would cost more than it saves
+        return {
+            source: store.search(
+                query_vector, top_k=top_k, filter={"source": {"$eq": source}}
+            )
+            for source in sources
+        }
+
+    futures = {
+        source: _search_executor.submit(
+            store.search,
+            query_vector,
+            top_k=top_k,
+            filter={"source": {"$eq": source}},
+        )
+        for source in sources
+    }
+    return {source: future.result() for source, future in futures.items()}
+
+
+async def search_sources_async(
+    query_vector: List[float],
+    sources: List[str] = KNOWLEDGE_SOURCES,
+    top_k: int = 5,
+) -> Dict[str, Dict[str, Any]]:
+    """Async version of search_sources; blocking backend calls run on worker threads."""
+    # May (re)load the local store from disk
+    store = await asyncio.to_thread(get_vector_store)
+    if isinstance(store, LocalVectorStore):
+        # One in-memory matrix product per source; a single worker thread is enough
+        return await asyncio.to_thread(search_sources, query_vector, sources, top_k)
+
+    results = await asyncio.gather(
+        *(
+            asyncio.to_thread(
+                store.search, query_vector, top_k=top_k, filter={"source": {"$eq": source}}
+            )
+            for source in sources
+        )
+    )
+    return dict(zip(sources, results))
+
+
 def get_embedding(text, model=OPENAI_EMBEDDING_MODEL):
     """Generates an embedding for the given text using OpenAI API."""
+    cached = embedding_cache.get(text, model)
+    if cached is not None:
+        return cached
+
     try:
         text = text.replace("\n", " ")  # Recommended by OpenAI
         response = openai_client.embeddings.create(input=[text], model=model)
-        return response.data[0].embedding
+        embedding = response.data[0].embedding
+        embedding_cache.put(text, model, embedding)
+        return embedding
     except Exception as e:
         print(f"Error getting embedding for text: '{text[:50]}...' - {e}")
         # Consider adding retry logic here if needed
         return None
 
 
-def process_knowledge_search_results(raw_jira_results, raw_meeting_results, query):
+async def get_embedding_async(text, model=OPENAI_EMBEDDING_MODEL):
+    """Async version of get_embedding, sharing its cache."""
+    # The cache is SQLite-backed (a read, plus a write on disk hits), so keep it off the event loop
+    cached = await asyncio.to_thread(embedding_cache.get, text, model)
+    if cached is not None:
+        return cached
+
+    try:
+        text = text.replace("\n", " ")  # Recommended by OpenAI
+        response = await get_async_openai_client().embeddings.create(input=[text], model=model)
+        embedding = response.data[0].embedding
+        await asyncio.to_thread(embedding_cache.put, text, model, embedding)
+        return embedding
+    except Exception as e:
+        print(f"Error getting embedding for text: '{text[:50]}...' - {e}")
+        return None
+
+
+def _read_meeting_text(meeting_store, meeting_id, start=None, end=None):
+    """Read a meeting (or a span of it), returning None if it cannot be loaded."""
+    try:
+        return meeting_store.get_span(meeting_id, start, end)
+    except Exception as e:
+        print(f"Failed to load meeting {meeting_id} from meeting map: {e}")
+        return None
+
+
+def process_knowledge_search_results(
+    raw_jira_results,
+    raw_meeting_results,
+    query,
+    token_budget=SEARCH_RESULT_TOKEN_BUDGET,
+):
     """
     Process and combine search results from Jira tickets and meeting transcripts.
 
@@ -166,23 +429,21 @@ def process_knowledge_search_results(raw_jira_results, raw_meeting_results, quer
         raw_jira_results: The raw results from searching Jira tickets
         raw_meeting_results: The raw results from searching meeting transcripts
         query: The original search query
+        token_budget: Approximate token limit for the returned JSON
 
     Returns:
-        A JSON string containing the combined search results
+        A compact JSON string containing the combined, deduplicated search
+        results, with long texts cut to excerpts around the match
     """
     # Initialize results container
     all_results = []
     success = True
     error_message = ""
+    # Notes from sources answered by only some of their retrievers
+    degraded_messages = []
 
-    # Load meeting map for transcript lookup
-    meeting_map = {}
-    try:
-        if os.path.exists(MEETING_MAP_PATH):
-            with open(MEETING_MAP_PATH, "r") as f:
-                meeting_map = json.load(f)
-    except Exception as e:
-        error_message += f"Failed to load meeting map: {str(e)} "
+    # Meeting texts are read on demand from the shared store
+    meeting_store = get_meeting_store(MEETING_MAP_PATH)
 
     # Process Jira results
     if raw_jira_results.get("success", False):
@@ -201,6 +462,8 @@ def process_knowledge_search_results(raw_jira_results, raw_meeting_results, quer
                 "type": "jira",
             }
             all_results.append(result)
+        if raw_jira_results.get("degraded"):
+            degraded_messages.append(raw_jira_results.get("message", ""))
     else:
         # If Jira search failed, capture error but continue with meeting results
         success = raw_jira_results.get("success", False)
@@ -217,9 +480,23 @@ def process_knowledge_search_results(raw_jira_results, raw_meeting_results, quer
             if "source_type" not in metadata:
                 metadata["source_type"] = "meeting_transcript"
 
-            # Add raw transcript text from meeting map if available
-            if meeting_id in meeting_map:
-                metadata["raw_text"] = meeting_map[meeting_id]
+            if "start_char" in metadata:
+                # Chunked index: return only the matched window, not the whole meeting
+                chunk_text = metadata.pop("text", None)
+                if chunk_text is None:
+                    chunk_text = _read_meeting_text(
+                        meeting_store,
+                        metadata.get("meeting_id", ""),
+                        int(metadata["start_char"]),
+                        int(metadata["end_char"]),
+                    )
+                if chunk_text is not None:
+                    metadata["raw_text"] = chunk_text
+            else:
+                # Whole-meeting vectors: add raw transcript text from meeting map
+                meeting_text = _read_meeting_text(meeting_store, meeting_id)
+                if meeting_text is not None:
+                    metadata["raw_text"] = meeting_text
 
             result = {
                 "id": meeting_id,
@@ -228,6 +505,8 @@ def process_knowledge_search_results(raw_jira_results, raw_meeting_results, quer
                 "type": "meeting",
             }
             all_results.append(result)
+        if raw_meeting_results.get("degraded"):
+            degraded_messages.append(raw_meeting_results.get("message", ""))
     else:
         # If meeting search failed, capture error
         if success:  # Only override success if it was true before
@@ -247,65 +526,238 @@ def process_knowledge_search_results(raw_jira_results, raw_meeting_results, quer
         "results": all_results,
     }
 
+    if degraded_messages:
+        # Tell the agent these are partial (e.g. keyword-only) results
+        response["degraded"] = True
+        error_message += " " + " ".join(dict.fromkeys(degraded_messages))
+
     # Add error message if there was an error
     if error_message:
         response["message"] = error_message.strip()
 
-    # Return as JSON string
-    return json.dumps(response, indent=2)
+    # Return as compact JSON that fits the token budget
+    return pack_search_results(response, token_budget)
+
+
+def _search_cache_key(query: str, top_k: int, token_budget: int) -> str:
+    return search_result_cache.make_key(
+        query, top_k, token_budget=token_budget, backend=VECTOR_STORE_BACKEND
+    )
+
+
+def _search_cache_scope(top_k: int, token_budget: int) -> str:
+    return search_result_cache.make_scope(
+        top_k, token_budget=token_budget, backend=VECTOR_STORE_BACKEND
+    )
+
+
+def _cached_search(query: str, top_k: int, token_budget: int):
+    """
+    Look up a search in the result cache: the exact query first, then warmed topics.
+
+    Returns:
+        (cache key, results JSON or None on a miss)
+    """
+    cache_key = _search_cache_key(query, top_k, token_budget)
+    cached = search_result_cache.get(cache_key)
+    if cached is not None:
+        return cache_key, cached
+    covering = search_result_cache.get_covering(query, _search_cache_scope(top_k, token_budget))
+    if covering is None:
+        return cache_key, None
+    topic, cached = covering
+    # Say which search the results came from rather than passing them off as this query's
+    results = json.loads(cached)
+    results["query"] = query
+    results["matched_topic"] = topic
+    return cache_key, json.dumps(results, separators=COMPACT_SEPARATORS, ensure_ascii=False)
+
+
+def warm_search_cache(topic: str, top_k=3, token_budget=SEARCH_RESULT_TOKEN_BUDGET) -> str:
+    """
+    Search for a topic ahead of time so later related queries are answered from the cache.
+
+    Unlike a plain search_knowledge call, the cached result also answers
+    queries asking for the same topic in other words, e.g. "wifi issues" for
+    "wifi" (see SearchResultCache.get_covering).
+
+    Returns:
+        The search results JSON
+    """
+    results = search_knowledge(topic, top_k, token_budget)
+    search_result_cache.add_topic(
+        _search_cache_key(topic, top_k, token_budget),
+        _search_cache_scope(top_k, token_budget),
+        topic,
+    )
+    return results
+
+
+def _lexical_candidates(query: str, top_k: int):
+    """
+    Run the BM25 half of a search.
+
+    Returns:
+        (is_exact_lookup, per-source lexical results)
+    """
+    lexical_index = get_lexical_index()
+    # Fetch deeper candidate lists so fusion can promote items ranked lower by one retriever
+    lexical_results = lexical_index.search_sources(query, KNOWLEDGE_SOURCES, top_k=top_k * 2)
+    return lexical_index.is_exact_lookup(query), lexical_results
+
+
+def _fuse_and_pack(query, top_k, token_budget, cache_key, is_exact, lexical_results, vector_results):
+    """Fuse per-source results with RRF, pack them for the agent and cache complete results."""
+    # Exact lookups skip the vector half; otherwise a missing vector result (failed
+    # embedding) is fused as a failure so the results are marked degraded
+    missing_vector = {"success": False, "message": "Semantic search unavailable (embedding failed)."}
+    raw_results = {
+        source: reciprocal_rank_fusion(
+            [lexical_results[source]]
+            if is_exact
+            else [vector_results.get(source, missing_vector), lexical_results[source]],
+            top_k,
+        )
+        for source in KNOWLEDGE_SOURCES
+    }
 
+    # Process and combine the results
+    results_json = process_knowledge_search_results(
+        raw_results["jira_ticket"], raw_results["meeting_transcript"], query, token_budget
+    )
+    # RRF reports success if any input did, so check both halves: a lexical-only
+    # fallback after a failed embedding or vector query is returned but not
+    # cached, so searches recover as soon as the vector backend does
+    vector_ok = is_exact or all(
+        source in vector_results and vector_results[source]["success"]
+        for source in KNOWLEDGE_SOURCES
+    )
+    lexical_ok = all(lexical_results[source]["success"] for source in KNOWLEDGE_SOURCES)
+    if vector_ok and lexical_ok:
+        search_result_cache.put(cache_key, results_json)
+    return results_json
 
-def search_knowledge(query: str, top_k=3):
+
+def search_knowledge(query: str, top_k=3, token_budget=SEARCH_RESULT_TOKEN_BUDGET):
     """
     Search the knowledge base for information related to the query.
     Searches both Jira tickets and meeting transcripts and combines the results.
 
+    Vector and BM25 results are merged per source with reciprocal-rank fusion.
+    Queries naming a known ticket key or person are answered from the lexical
+    index alone, without an embedding call.
+
     Args:
         query: The search query text
         top_k: The number of top results to return for each source
+        token_budget: Approximate token limit for the returned JSON
 
     Returns:
         A JSON string containing the combined search results
     """
-    vector = get_embedding(query)
-    if vector is None:
-        return json.dumps(
-            {
-                "success": False,
-                "message": "Failed to generate embedding for query",
-                "query": query,
-                "results_count": 0,
-                "results": [],
-            }
-        )
-
-    # Search for Jira tickets
-    raw_jira_results = search_pinecone(
-        vector,
-        PINECONE_API_KEY,
-        PINECONE_ENVIRONMENT,
-        PINECONE_INDEX_HOST,
-        top_k=top_k,
-        filter={"source": {"$eq": "jira_ticket"}},
+    cache_key, cached = _cached_search(query, top_k, token_budget)
+    if cached is not None:
+        return cached
+
+    is_exact, lexical_results = _lexical_candidates(query, top_k)
+    vector_results = {}
+    if not is_exact:
+        vector = get_embedding(query)
+        if vector is None:
+            # Fall back to keyword matches rather than failing outright
+            print("Embedding failed; using lexical search results only.")
+        else:
+            # Search Jira tickets and meeting transcripts concurrently
+            vector_results = search_sources(vector, top_k=top_k * 2)
+
+    return _fuse_and_pack(
+        query, top_k, token_budget, cache_key, is_exact, lexical_results, vector_results
     )
 
-    # Search for meeting transcripts
-    raw_meeting_results = search_pinecone(
-        vector,
-        PINECONE_API_KEY,
-        PINECONE_ENVIRONMENT,
-        PINECONE_INDEX_HOST,
-        top_k=top_k,
-        filter={"source": {"$eq": "meeting_transcript"}},
-    )
 
-    # Process and combine the results
-    return process_knowledge_search_results(
-        raw_jira_results, raw_meeting_results, query
+async def search_knowledge_async(query: str, top_k=3, token_budget=SEARCH_RESULT_TOKEN_BUDGET):
+    """
+    Async version of search_knowledge with the same arguments and result.
+
+    The embedding uses the async OpenAI client; the per-source vector
+    queries run concurrently on worker threads. Blocking local work (a
+    lexical index rebuild after the data files change, the embedding cache
+    and reading meeting text while packing) also runs on worker threads, so
+    it does not stall other coroutines on the shared event loop.
+    """
+    cache_key, cached = _cached_search(query, top_k, token_budget)
+    if cached is not None:
+        return cached
+
+    is_exact, lexical_results = await asyncio.to_thread(_lexical_candidates, query, top_k)
+    vector_results = {}
+    if not is_exact:
+        vector = await get_embedding_async(query)
+        if vector is None:
+            # Fall back to keyword matches rather than failing outright
+            print("Embedding failed; using lexical search results only.")
+        else:
+            vector_results = await search_sources_async(vector, top_k=top_k * 2)
+
+    return await asyncio.to_thread(
+        _fuse_and_pack,
+        query, top_k, token_budget, cache_key, is_exact, lexical_results, vector_results,
     )
 
 
+def invalidate_search_cache(reason: str = "manual") -> None:
+    """Drop all cached search results, e.g. after the knowledge base changed."""
+    search_result_cache.invalidate(reason)
+
+
+def get_search_cache_stats() -> Dict[str, Any]:
+    """Return search result cache counters (hits, misses, evictions, hit_rate, ...)."""
+    return search_result_cache.get_stats()
+
+
+def benchmark_pinecone_client(iterations: int = 5) -> Dict[str, float]:
+    """
+    Compare search latency with a fresh client per query (cold) against the shared client (warm).
+
+    Args:
+        iterations: Number of searches to time for each mode
+
+    Returns:
+        Dict with the average cold and warm latencies in seconds
+    """
+    vector = get_embedding("WiFi not working")
+    if vector is None:
+        raise RuntimeError("Failed to generate embedding for benchmark query")
+
+    cold_times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        PineconeClient(
+            PINECONE_API_KEY, PINECONE_ENVIRONMENT, PINECONE_INDEX_HOST
+        ).search(vector, top_k=3)
+        cold_times.append(time.perf_counter() - start)
+
+    client = get_pinecone_client()
+    client.search(vector, top_k=3)  # Warm up the shared client's connection
+    warm_times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        client.search(vector, top_k=3)
+        warm_times.append(time.perf_counter() - start)
+
+    return {
+        "cold_avg": sum(cold_times) / len(cold_times),
+        "warm_avg": sum(warm_times) / len(warm_times),
+    }
+
+
 if __name__ == "__main__":
+    if "--benchmark" in sys.argv:
+        timings = benchmark_pinecone_client()
+        print(f"Cold client search: {timings['cold_avg'] * 1000:.1f} ms")
+        print(f"Warm client search: {timings['warm_avg'] * 1000:.1f} ms")
+        sys.exit(0)
+
     # Example usage
     # This is just an example vector - replace with your actual vector
 
@@ -0,0 +1,277 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+from knowledge_corpus import (
+    JIRA_TICKETS_PATH,
+    MEETING_TRANSCRIPTS_PATH,
+    build_jira_items,
+    build_meeting_items,
+)
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Reciprocal-rank fusion constant; larger values flatten the rank weighting
+RRF_K = 60
+
+# Common English words that never identify a topic on their own
+STOPWORDS = frozenset(
+    """
+    a about above after again all also am an and any are as at be because been before
+    being below between both but by can could did do does doing done down during each
+    else few for from further get gets getting got had has have having he her here hers
+    him his how i if in into is it its itself just know let like me more most my no nor
+    not now of off ok okay on once only or other our ours out over own really right same
+    say said she should so some still such than that the their them then there these they
+    thing things think this those through to too um uh under until up us very want was we
+    well were what when where which while who whom why will with would yeah yes you your
+    going gonna need needs one two maybe sure thanks thank hey hi bit lot kind sort
+    guess mean actually pretty probably great good next last
+    """.split()
+)
+
+# Ticket keys like "SPC-042" are kept as single tokens
+TICKET_KEY_PATTERN = re.compile(r"\b([a-z]+)-(\d+)\b", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"[a-z]+-\d+|[a-z0-9]+")
+
+
+def _canonical_key(prefix: str, number: str) -> str:
+    # "SPC-042" and "spc-42" refer to the same ticket
+    return f"{prefix.lower()}-{int(number)}"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into BM25 terms, keeping ticket keys whole."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        key_match = TICKET_KEY_PATTERN.fullmatch(token)
+        tokens.append(_canonical_key(*key_match.groups()) if key_match else token)
+    return tokens
+
+
+def _normalize_name(name: str) -> str:
+    return " ".join(tokenize(name))
+
+
+class _BM25Source:
+    """Inverted index and BM25 scoring over the documents of one source type"""
+
+    def __init__(self, items: List[Dict[str, Any]], texts: List[str]):
+        self.items = items
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.doc_lengths = []
+        for doc, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                self.postings[term][doc] = count
+        self.avg_length = (
+            sum(self.doc_lengths) / len(self.doc_lengths) if self.doc_lengths else 0.0
+        )
+
+    def search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        n_docs = len(self.items)
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc, tf in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc] / self.avg_length)
+                scores[doc] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [
+            {
+                "id": self.items[doc]["id"],
+                "score": score,
+                # Copy so callers can annotate metadata without touching the index
+                "metadata": dict(self.items[doc]["metadata"]),
+            }
+            for doc, score in ranked
+        ]
+
+
+class LexicalIndex:
+    """BM25 index over Jira tickets and meeting transcript windows"""
+
+    def __init__(self, jira_items: List[Dict[str, Any]], meeting_items: List[Dict[str, Any]]):
+        """
+        Build the index.
+
+        Args:
+            jira_items: Items from knowledge_corpus.build_jira_items
+            meeting_items: Items from knowledge_corpus.build_meeting_items
+        """
+        jira_texts = [
+            " ".join(
+                [
+                    item["metadata"]["ticket_id"],
+                    item["text"],
+                    item["metadata"].get("assignee") or "",
+                    item["metadata"].get("reporter") or "",
+                ]
+            )
+            for item in jira_items
+        ]
+        self.sources = {
+            "jira_ticket": _BM25Source(jira_items, jira_texts),
+            "meeting_transcript": _BM25Source(
+                meeting_items, [item["text"] for item in meeting_items]
+            ),
+        }
+
+        # Every term that occurs in at least one document
+        self.vocabulary = set()
+        for index in self.sources.values():
+            self.vocabulary.update(index.postings)
+
+        # Known entities for exact-match lookups
+        self.ticket_keys = {
+            _canonical_key(*TICKET_KEY_PATTERN.fullmatch(item["metadata"]["ticket_id"]).groups())
+            for item in jira_items
+            if TICKET_KEY_PATTERN.fullmatch(item["metadata"]["ticket_id"] or "")
+        }
+        names = set()
+        for item in meeting_items:
+            names.update(item["metadata"].get("speakers", []))
+        for item in jira_items:
+            names.update(
+                name
+                for name in (item["metadata"].get("assignee"), item["metadata"].get("reporter"))
+                if name
+            )
+        self.names = {_normalize_name(name) for name in names if _normalize_name(name)}
+
+    def is_exact_lookup(self, query: str) -> bool:
+        """
+        Whether the query targets a known entity and can be answered lexically.
+
+        True if the query mentions an existing ticket key, or is exactly the name
+        of a known speaker, assignee or reporter.
+        """
+        for prefix, number in TICKET_KEY_PATTERN.findall(query):
+            if _canonical_key(prefix, number) in self.ticket_keys:
+                return True
+        return _normalize_name(query) in self.names
+
+    def document_frequency(self, term: str) -> float:
+        """Fraction of all indexed documents (every source) that contain the term."""
+        total = sum(len(index.items) for index in self.sources.values())
+        if not total:
+            return 0.0
+        return sum(len(index.postings.get(term, ())) for index in self.sources.values()) / total
+
+    def search(self, query: str, top_k: int = 5, source: str = "jira_ticket") -> Dict[str, Any]:
+        """
+        Search one source with BM25.
+
+        Returns:
+            Dict in the same shape as a vector store search result
+        """
+        index = self.sources.get(source)
+        if index is None:
+            return {"success": False, "message": f"Unknown source: {source}", "results": None}
+        return {"success": True, "results": {"matches": index.search(query, top_k)}}
+
+    def search_sources(
+        self, query: str, sources: List[str], top_k: int = 5
+    ) -> Dict[str, Dict[str, Any]]:
+        """Search several sources, returning a dict of per-source results."""
+        return {source: self.search(query, top_k, source) for source in sources}
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[Dict[str, Any]], top_k: int, k: int = RRF_K
+) -> Dict[str, Any]:
+    """
+    Fuse ranked search results with reciprocal-rank fusion.
+
+    Each match scores sum(1 / (k + rank)) over the lists it appears in. The
+    metadata of its first occurrence is kept, so list the vector results first.
+
+    Args:
+        result_lists: Search results (dicts with "success" and "results"["matches"])
+        top_k: Number of fused matches to return
+        k: RRF constant
+
+    Returns:
+        Dict in the same shape as a vector store search result; "success" is
+        True if any input succeeded. If some inputs failed, "degraded" is True
+        and "message" says why
+    """
+    fused_scores: Dict[str, float] = defaultdict(float)
+    first_match: Dict[str, Dict[str, Any]] = {}
+    messages = []
+    success = False
+    for result in result_lists:
+        if not result.get("success", False):
+            messages.append(result.get("message", "Search failed"))
+            continue
+        success = True
+        for rank, match in enumerate((result.get("results") or {}).get("matches", []), start=1):
+            match_id = match.get("id")
+            fused_scores[match_id] += 1.0 / (k + rank)
+            first_match.setdefault(match_id, match)
+
+    ranked = sorted(fused_scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    matches = [
+        {
+            "id": match_id,
+            "score": score,
+            "metadata": dict(first_match[match_id].get("metadata") or {}),
+        }
+        for match_id, score in ranked
+    ]
+    fused = {"success": success, "results": {"matches": matches}}
+    if messages:
+        fused["message"] = " ".join(messages)
+        if success:
+            # Matches come from the remaining inputs only
+            fused["degraded"] = True
+    return fused
+
+
+_lexical_index: Optional[LexicalIndex] = None
+_lexical_index_mtimes = None
+_lexical_index_lock = threading.Lock()
+
+
+def get_lexical_index(
+    meeting_path: str = MEETING_TRANSCRIPTS_PATH, jira_path: str = JIRA_TICKETS_PATH
+) -> LexicalIndex:
+    """
+    Return the shared lexical index, rebuilding it when the source files change.
+
+    Args:
+        meeting_path: Path to meeting_transcripts.txt
+        jira_path: Path to jira_tickets.json
+    """
+    global _lexical_index, _lexical_index_mtimes
+    mtimes = tuple(
+        os.path.getmtime(path) if os.path.exists(path) else None
+        for path in (meeting_path, jira_path)
+    )
+    with _lexical_index_lock:
+        if _lexical_index is None or mtimes != _lexical_index_mtimes:
+            meeting_items = []
+            jira_items = []
+            try:
+                with open(meeting_path, "r", encoding="utf-8") as f:
+                    meeting_items = build_meeting_items(f.read())
+            except OSError as e:
+                print(f"Lexical index: could not read {meeting_path} ({e})")
+            try:
+                with open(jira_path, "r", encoding="utf-8") as f:
+                    jira_items = build_jira_items(json.load(f))
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Lexical index: could not read {jira_path} ({e})")
+            _lexical_index = LexicalIndex(jira_items, meeting_items)
+            _lexical_index_mtimes = mtimes
+        return _lexical_index
@@ -1,6 +1,5 @@
 import glob
 import os
-import threading
 import time
 import tkinter as tk
 from tkinter import filedialog
@@ -8,7 +7,9 @@ from tkinter import filedialog
 import customtkinter as ctk
 from dotenv import load_dotenv
 
+import async_runtime
 from agent_flow import AgentManager
+from proactive_retrieval import ProactiveRetriever
 from transcription import ElevenLabsTranscriptionManager as TranscriptionManager
 
 DEBUG_MODE = False
@@ -47,6 +48,8 @@ class MeetingAssistantApp:
             callback_new_text=self.on_new_transcript
         )
         self.agent_manager = AgentManager(callback_status_update=self.update_status)
+        # Warms the search cache with topics as they come up in the meeting
+        self.proactive_retriever = ProactiveRetriever()
 
         # Set up UI
         self.setup_ui()
@@ -131,6 +134,8 @@ class MeetingAssistantApp:
             f"[Callback Main] on_new_transcript received text (length {len(new_text)}): '{new_text[:100]}...'"
         )
         self.meeting_transcript += new_text
+        self.agent_manager.update_transcript(self.meeting_transcript)
+        self.proactive_retriever.on_new_text(new_text)
 
     def on_agent_response(self, response_text):
         """Callback when agent has generated a response"""
@@ -143,6 +148,7 @@ class MeetingAssistantApp:
 
         # Add to main transcript
         self.meeting_transcript += formatted_response
+        self.agent_manager.update_transcript(self.meeting_transcript)
 
         # Also save to the transcription manager's file if available
         if hasattr(self.transcription_manager, "transcript_file"):
@@ -204,13 +210,12 @@ class MeetingAssistantApp:
             f"'{transcript_to_use[:500]}{'...' if len(transcript_to_use) > 500 else ''}'"
         )
 
-        agent_thread = threading.Thread(
-            target=lambda: self.agent_manager.run_agent(
+        # Runs on the shared agent event loop thread; the Tk main loop is not blocked
+        async_runtime.submit(
+            self.agent_manager.run_agent_async(
                 transcript_to_use, on_agent_response=self.on_agent_response
             )
         )
-        agent_thread.daemon = True
-        agent_thread.start()
 
     def load_debug_transcript(self) -> str | None:
         """Finds and loads a transcript file for debugging.
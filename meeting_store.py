@@ -0,0 +1,161 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Path to the meeting map JSON file ({"meeting-N": "<full transcript>", ...})
+MEETING_MAP_PATH = os.path.join("data", "meeting_map.json")
+# Number of decoded meetings kept in memory
+MEETING_CACHE_SIZE = 16
+
+# One top-level "key": "value" pair of a flat JSON object of strings. The
+# string bodies use the unrolled [^"\\]*(?:\\.[^"\\]*)* form so scanning long
+# transcripts never backtracks. Matching on bytes is safe for UTF-8 because the
+# quote and backslash bytes never occur inside multi-byte characters.
+_JSON_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_ENTRY_PATTERN = re.compile(
+    rb"\s*(" + _JSON_STRING + rb")\s*:\s*(" + _JSON_STRING + rb")\s*([,}])", re.DOTALL
+)
+
+
+def _build_offset_index(data: bytes) -> Optional[Dict[str, Tuple[int, int]]]:
+    """
+    Map each meeting id to the (offset, length) of its JSON string value.
+
+    Returns:
+        The offset index, or None if the file is not a flat object of strings
+    """
+    start = data.find(b"{")
+    if start == -1:
+        return None
+    index = {}
+    position = start + 1
+    if data[position:].strip() == b"}":
+        return index
+    while True:
+        match = _ENTRY_PATTERN.match(data, position)
+        if match is None:
+            return None
+        key = json.loads(match.group(1))
+        index[key] = (match.start(2), match.end(2) - match.start(2))
+        position = match.end()
+        if match.group(3) == b"}":
+            return index
+
+
+class MeetingStore:
+    """Read-only access to meeting transcripts without parsing the whole map per lookup"""
+
+    def __init__(self, path: str = MEETING_MAP_PATH, cache_size: int = MEETING_CACHE_SIZE):
+        """
+        Initialize the store. Nothing is read until the first lookup.
+
+        Args:
+            path: Path to meeting_map.json
+            cache_size: Number of decoded meetings to keep in memory
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        # Only used if the file cannot be indexed by offset
+        self._fallback: Optional[Dict[str, str]] = None
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self.stats = {"reloads": 0, "reads": 0, "cache_hits": 0}
+
+    def _refresh(self) -> None:
+        """Rebuild the offset index if the file changed since it was last read."""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+
+        self._offsets = {}
+        self._fallback = None
+        self._cache.clear()
+        self._mtime = mtime
+        if mtime is None:
+            return
+
+        self.stats["reloads"] += 1
+        with open(self.path, "rb") as f:
+            data = f.read()
+        offsets = _build_offset_index(data)
+        if offsets is None:
+            print(f"Meeting map at {self.path} is not a flat string map; loading it whole.")
+            self._fallback = json.loads(data)
+        else:
+            self._offsets = offsets
+
+    def ids(self) -> List[str]:
+        """Return the ids of all stored meetings."""
+        with self.lock:
+            self._refresh()
+            if self._fallback is not None:
+                return list(self._fallback)
+            return list(self._offsets)
+
+    def __contains__(self, meeting_id: str) -> bool:
+        with self.lock:
+            self._refresh()
+            if self._fallback is not None:
+                return meeting_id in self._fallback
+            return meeting_id in self._offsets
+
+    def get(self, meeting_id: str) -> Optional[str]:
+        """
+        Return the full text of one meeting.
+
+        Args:
+            meeting_id: Meeting id, e.g. "meeting-3"
+
+        Returns:
+            The transcript text, or None if the meeting is unknown
+        """
+        with self.lock:
+            self._refresh()
+            if self._fallback is not None:
+                return self._fallback.get(meeting_id)
+
+            text = self._cache.get(meeting_id)
+            if text is not None:
+                self._cache.move_to_end(meeting_id)
+                self.stats["cache_hits"] += 1
+                return text
+
+            location = self._offsets.get(meeting_id)
+            if location is None:
+                return None
+            offset, length = location
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                text = json.loads(f.read(length))
+            self.stats["reads"] += 1
+
+            self._cache[meeting_id] = text
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return text
+
+    def get_span(self, meeting_id: str, start: int, end: int) -> Optional[str]:
+        """Return text[start:end] of one meeting, or None if the meeting is unknown."""
+        text = self.get(meeting_id)
+        return None if text is None else text[start:end]
+
+
+_meeting_store: Optional[MeetingStore] = None
+_meeting_store_lock = threading.Lock()
+
+
+def get_meeting_store(path: str = MEETING_MAP_PATH) -> MeetingStore:
+    """Return the shared meeting store, creating it on first use."""
+    global _meeting_store
+    with _meeting_store_lock:
+        if _meeting_store is None or _meeting_store.path != path:
+            _meeting_store = MeetingStore(path)
+        return _meeting_store
@@ -0,0 +1,323 @@
+import math
+import os
+import queue
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List
+
+from knowledge_search import warm_search_cache
+from lexical_index import STOPWORDS, TICKET_KEY_PATTERN, get_lexical_index, tokenize
+from search_cache import GENERIC_TERMS, QUALIFIER_TERMS, query_terms
+
+# Budget of searches that may need an embedding call, per rolling minute
+PROACTIVE_EMBEDDINGS_PER_MINUTE = int(os.environ.get("PROACTIVE_EMBEDDINGS_PER_MINUTE", "10"))
+PROACTIVE_TOPICS_PER_UPDATE = 3  # Topics searched per batch of new transcript
+PROACTIVE_WINDOW_CHARS = 2000  # Recent transcript scanned for topics
+# A topic is not searched again within this many seconds (matches the result cache TTL)
+PROACTIVE_TOPIC_COOLDOWN_SECONDS = 300
+MAX_PHRASE_WORDS = 3
+
+# The assistant's name; lines it speaks are not requests, sentences naming it are
+ASSISTANT_NAME = "alex"
+REQUEST_TAIL_CHARS = 1500  # Transcript tail searched for the latest request
+REQUEST_QUERY_MAX_TERMS = 4  # Terms in a speculative query; the rarest in the corpus are kept
+# Earlier sentences searched for the topic when the request only refers to it ("this problem")
+REQUEST_CONTEXT_SENTENCES = 3
+# Live transcription has no line breaks, so requests are cut at sentence ends
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+# Words used when asking for context that say nothing about the topic
+REQUEST_FILLER_TERMS = frozenset(
+    """
+    context helpful previous past meeting meetings ticket tickets remember time talked talk
+    trying fixed fix check tell look find anything something everyone team guys idea
+    run day days week weeks today yesterday tomorrow
+    """.split()
+)
+# "**Lidia H**:" or "Alex:" at the start of a line; who speaks is not a topic
+SPEAKER_LABEL_PATTERN = re.compile(r"^[ \t]*\**[A-Za-z][\w .'-]{0,40}?\**[ \t]*:", re.MULTILINE)
+# Clause boundaries; phrases never span them
+CLAUSE_SPLIT_PATTERN = re.compile(r"[.,;:!?()\"\n]+")
+WORD_PATTERN = re.compile(r"[A-Za-z]+-\d+|[A-Za-z0-9']+")
+
+
+class RateLimiter:
+    """Sliding-window limit of N events per period"""
+
+    def __init__(self, max_events: int, period_seconds: float = 60.0):
+        self.max_events = max_events
+        self.period_seconds = period_seconds
+        self.events = deque()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Record an event if the budget allows it."""
+        with self.lock:
+            now = time.monotonic()
+            while self.events and now - self.events[0] > self.period_seconds:
+                self.events.popleft()
+            if len(self.events) >= self.max_events:
+                return False
+            self.events.append(now)
+            return True
+
+
+def extract_topics(text: str, limit: int = PROACTIVE_TOPICS_PER_UPDATE) -> List[str]:
+    """
+    Pick likely search topics from transcript text.
+
+    Ticket keys and known people (speakers, assignees, reporters) mentioned
+    in what was said come first; speaker labels are ignored. Then come
+    phrases of up to MAX_PHRASE_WORDS consecutive non-stopwords whose words
+    all occur in the knowledge base, ranked by how often they were said,
+    longer phrases first.
+
+    Args:
+        text: Recent transcript text
+        limit: Maximum number of topics to return
+
+    Returns:
+        Topic strings, most promising first
+    """
+    lexical_index = get_lexical_index()
+    text = SPEAKER_LABEL_PATTERN.sub("", text)
+    topics = []
+
+    for prefix, number in TICKET_KEY_PATTERN.findall(text):
+        key = f"{prefix.upper()}-{number}"
+        if lexical_index.is_exact_lookup(key) and key not in topics:
+            topics.append(key)
+
+    lowered = " ".join(tokenize(text))
+    for name in lexical_index.names:
+        if re.search(rf"(?<![a-z0-9]){re.escape(name)}(?![a-z0-9])", lowered) and name not in topics:
+            topics.append(name)
+
+    vocabulary = lexical_index.vocabulary
+    phrases = Counter()
+    for clause in CLAUSE_SPLIT_PATTERN.split(text):
+        run = []
+        for word in WORD_PATTERN.findall(clause) + [""]:
+            token = word.lower()
+            if token and token not in STOPWORDS and len(token) > 2 and token in vocabulary:
+                run.append(token)
+                continue
+            # Count the longest phrases ending at each position of the run
+            for end in range(1, len(run) + 1):
+                start = max(0, end - MAX_PHRASE_WORDS)
+                phrases[" ".join(run[start:end])] += 1
+            run = []
+
+    # Longer phrases make more specific queries, so weight counts by length
+    ranked = sorted(
+        phrases.items(), key=lambda item: item[1] * len(item[0].split()), reverse=True
+    )
+    for phrase, _ in ranked:
+        words = set(phrase.split())
+        # Skip numbers and phrases overlapping a topic already picked
+        if phrase.isdigit() or any(words & set(topic.split()) for topic in topics):
+            continue
+        topics.append(phrase)
+        if len(topics) >= limit:
+            break
+    return topics[:limit]
+
+
+def _sentences_since_assistant(transcript: str) -> List[str]:
+    """Split what was said since the assistant last spoke into sentences, without speaker labels."""
+    sentences = []
+    assistant_speaking = False
+    for sentence in SENTENCE_SPLIT_PATTERN.split(transcript[-REQUEST_TAIL_CHARS:]):
+        label = SPEAKER_LABEL_PATTERN.match(sentence)
+        if label:
+            assistant_speaking = ASSISTANT_NAME in tokenize(label.group(0))
+            sentence = sentence[label.end():]
+        if assistant_speaking:
+            # Everything before the assistant's reply has been answered
+            sentences = []
+        elif sentence.strip():
+            sentences.append(sentence.strip())
+    return sentences
+
+
+def _request_start(sentences: List[str]) -> int:
+    """Index of the last sentence naming the assistant, or of the last sentence."""
+    for position in range(len(sentences) - 1, -1, -1):
+        if ASSISTANT_NAME in tokenize(sentences[position]):
+            return position
+    return max(0, len(sentences) - 1)
+
+
+def latest_request(transcript: str) -> str:
+    """
+    Find the most recent request to the assistant in the transcript tail.
+
+    Only what was said after the assistant last spoke is considered. The
+    request runs from the last sentence naming the assistant to the end;
+    without one, it is the last sentence said.
+
+    Args:
+        transcript: The meeting transcript so far
+
+    Returns:
+        The request text without speaker labels, or "" if nothing new was said
+    """
+    sentences = _sentences_since_assistant(transcript)
+    return " ".join(sentences[_request_start(sentences):])
+
+
+def _topic_terms(sentences: List[str]) -> List[str]:
+    """The rarest indexed content terms of the sentences, in spoken order."""
+    lexical_index = get_lexical_index()
+    first_seen = {}
+    for position, term in enumerate(tokenize(" ".join(sentences))):
+        if (
+            len(term) > 2
+            and term not in STOPWORDS
+            and term not in GENERIC_TERMS
+            and term not in REQUEST_FILLER_TERMS
+            and term != ASSISTANT_NAME
+            and term in lexical_index.vocabulary
+        ):
+            first_seen.setdefault(term, position)
+    # Rare terms say the most about the topic; later mentions break ties. Names
+    # come last: people are usually addressed ("Lidia, ...") rather than asked about
+    name_terms = {term for name in lexical_index.names for term in name.split()}
+    rarest = sorted(
+        first_seen,
+        key=lambda term: (
+            term in name_terms,
+            lexical_index.document_frequency(term),
+            -first_seen[term],
+        ),
+    )[:REQUEST_QUERY_MAX_TERMS]
+    return sorted(rarest, key=first_seen.get)
+
+
+def request_query(transcript: str) -> str:
+    """
+    Build a search query for the latest request in the transcript.
+
+    The query holds at most REQUEST_QUERY_MAX_TERMS terms that occur in the
+    knowledge base, taken from the request. If the request only refers back
+    to its topic, the REQUEST_CONTEXT_SENTENCES sentences before it are used.
+
+    Returns:
+        The query, or "" if no topic could be found (nothing worth searching)
+    """
+    sentences = _sentences_since_assistant(transcript)
+    start = _request_start(sentences)
+    terms = _topic_terms(sentences[start:])
+    if not terms:
+        terms = _topic_terms(sentences[max(0, start - REQUEST_CONTEXT_SENTENCES) : start])
+    return " ".join(terms)
+
+
+def query_coverage(query: str, reference: str) -> float:
+    """
+    Share of the query's topic terms that the reference query also contains.
+
+    Only terms that occur in the knowledge base count, weighted by how rare
+    they are (inverse document frequency), so "wifi office dropping" is
+    covered by "wifi main" while "catering quotes hackathon" is barely
+    covered by "wifi hackathon". Queries differing in a qualifier such as
+    "not" or "before" score 0.
+    """
+    qualifiers = QUALIFIER_TERMS.intersection(tokenize(query))
+    if qualifiers != QUALIFIER_TERMS.intersection(tokenize(reference)):
+        return 0.0
+    lexical_index = get_lexical_index()
+    reference_terms = query_terms(reference)
+    weights = {}
+    for token in tokenize(query):
+        if token not in lexical_index.vocabulary:
+            continue
+        # Compare in query_terms' form (plural "s" stripped), weigh by the spoken token
+        for term in query_terms(token) - GENERIC_TERMS:
+            weight = -math.log(lexical_index.document_frequency(token))
+            weights[term] = max(weights.get(term, 0.0), weight)
+    total = sum(weights.values())
+    if not total:
+        return 0.0
+    return sum(weight for term, weight in weights.items() if term in reference_terms) / total
+
+
+class ProactiveRetriever:
+    """Pre-runs knowledge searches for topics mentioned in the live transcript"""
+
+    def __init__(
+        self,
+        embeddings_per_minute: int = PROACTIVE_EMBEDDINGS_PER_MINUTE,
+        topics_per_update: int = PROACTIVE_TOPICS_PER_UPDATE,
+    ):
+        """
+        Initialize the retriever and start its worker thread.
+
+        Args:
+            embeddings_per_minute: Maximum searches needing an embedding call per minute
+            topics_per_update: Topics searched per batch of new text
+        """
+        self.topics_per_update = topics_per_update
+        self.rate_limiter = RateLimiter(embeddings_per_minute)
+        self.text_queue = queue.Queue()
+        self.recent_text = ""
+        self.searched_at: Dict[str, float] = {}
+        self.stats_lock = threading.Lock()
+        self.stats = {"updates": 0, "searches": 0, "lexical_searches": 0, "rate_limited": 0, "errors": 0}
+        self.worker = threading.Thread(target=self._run, name="proactive-retrieval", daemon=True)
+        self.worker.start()
+
+    def on_new_text(self, new_text: str) -> None:
+        """Transcription callback; returns immediately, the work happens on the worker thread."""
+        if new_text:
+            self.text_queue.put(new_text)
+
+    def _run(self) -> None:
+        while True:
+            text = self.text_queue.get()
+            # Handle everything that arrived meanwhile as one update
+            while True:
+                try:
+                    text += self.text_queue.get_nowait()
+                except queue.Empty:
+                    break
+            try:
+                self._process(text)
+            except Exception as e:
+                print(f"Proactive retrieval error: {e}")
+                self._count("errors")
+
+    def _process(self, new_text: str) -> None:
+        self._count("updates")
+        self.recent_text = (self.recent_text + new_text)[-PROACTIVE_WINDOW_CHARS:]
+        lexical_index = get_lexical_index()
+        now = time.monotonic()
+
+        for topic in extract_topics(self.recent_text, self.topics_per_update):
+            key = " ".join(sorted(query_terms(topic)))
+            if now - self.searched_at.get(key, float("-inf")) < PROACTIVE_TOPIC_COOLDOWN_SECONDS:
+                continue
+            # Exact lookups are answered lexically; anything else may cost an embedding call
+            if lexical_index.is_exact_lookup(topic):
+                self._count("lexical_searches")
+            elif self.rate_limiter.try_acquire():
+                self._count("searches")
+            else:
+                self._count("rate_limited")
+                continue
+            self.searched_at[key] = now
+            print(f"[Proactive] Warming search cache for '{topic}'")
+            # Stores the packed result in the search result cache, matchable by related queries
+            warm_search_cache(topic)
+
+    def _count(self, name: str) -> None:
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return update, search and rate-limit counters."""
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats["topics_tracked"] = len(self.searched_at)
+        return stats
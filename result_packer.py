@@ -0,0 +1,223 @@
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from lexical_index import tokenize
+
+# Approximate token budget for one search_knowledge tool result
+SEARCH_RESULT_TOKEN_BUDGET = int(os.environ.get("SEARCH_RESULT_TOKEN_BUDGET", "1000"))
+SNIPPET_MAX_CHARS = 600  # Longest excerpt kept per result
+MIN_SNIPPET_CHARS = 80  # Shorter excerpts are dropped rather than squeezed in
+CHARS_PER_TOKEN = 4  # Rough estimate; avoids a tokenizer dependency
+# Two windows of the same meeting overlapping by more than this are duplicates
+DUPLICATE_OVERLAP = 0.5
+
+# Metadata kept in the packed output, per result type
+JIRA_FIELDS = ("ticket_id", "summary", "status", "assignee", "labels", "created_date")
+MEETING_FIELDS = ("meeting_id", "meeting_date", "speakers")
+
+COMPACT_SEPARATORS = (",", ":")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=COMPACT_SEPARATORS, ensure_ascii=False)
+
+
+def _term_positions(text: str, terms: List[str]) -> List[int]:
+    """Character offsets of every whole-word occurrence of the query terms."""
+    if not terms:
+        return []
+    pattern = re.compile(
+        r"(?<![a-z0-9])(?:" + "|".join(re.escape(term) for term in terms) + r")(?![a-z0-9])",
+        re.IGNORECASE,
+    )
+    return [match.start() for match in pattern.finditer(text)]
+
+
+def excerpt(text: str, query: str, max_chars: int = SNIPPET_MAX_CHARS) -> str:
+    """
+    Cut text down to max_chars around the region that best matches the query.
+
+    The window is placed where it covers the most query-term occurrences (the
+    start of the text if none occur), then widened to word boundaries. Cut
+    ends are marked with "...".
+
+    Args:
+        text: Full text of the result
+        query: The search query
+        max_chars: Maximum excerpt length, excluding the ellipses
+
+    Returns:
+        The excerpt
+    """
+    text = text.strip()
+    if len(text) <= max_chars:
+        return text
+
+    positions = _term_positions(text, sorted(set(tokenize(query)), key=len, reverse=True))
+    start = 0
+    if positions:
+        # Slide a max_chars window over the hits and keep the densest placement
+        best_count = 0
+        right = 0
+        for left, position in enumerate(positions):
+            while right < len(positions) and positions[right] < position + max_chars:
+                right += 1
+            if right - left > best_count:
+                best_count = right - left
+                hits = positions[left:right]
+                # Centre the covered hits in the window
+                start = (hits[0] + hits[-1]) // 2 - max_chars // 2
+        start = max(0, min(start, len(text) - max_chars))
+
+    end = start + max_chars
+    # Move the cuts inwards to whitespace so words are not split
+    if start > 0:
+        space = text.find(" ", start, start + 40)
+        start = space + 1 if space != -1 else start
+    if end < len(text):
+        space = text.rfind(" ", end - 40, end)
+        end = space if space != -1 else end
+
+    snippet = text[start:end].strip()
+    if start > 0:
+        snippet = "..." + snippet
+    if end < len(text):
+        snippet += "..."
+    return snippet
+
+
+def _result_text(result: Dict[str, Any]) -> str:
+    metadata = result.get("metadata", {})
+    if result.get("type") == "meeting":
+        return metadata.get("raw_text") or metadata.get("text_snippet", "")
+    return metadata.get("text_snippet", "")
+
+
+def _span(result: Dict[str, Any]) -> Optional[Tuple[str, int, int]]:
+    metadata = result.get("metadata", {})
+    if result.get("type") != "meeting" or "start_char" not in metadata:
+        return None
+    return metadata.get("meeting_id", ""), int(metadata["start_char"]), int(metadata["end_char"])
+
+
+def _dedupe_keys(result: Dict[str, Any]) -> set:
+    """Ids and whitespace-normalized text identifying a result across sources."""
+    metadata = result.get("metadata", {})
+    keys = {
+        result.get("id"),
+        metadata.get("ticket_id"),
+        " ".join(_result_text(result).lower().split()),
+    }
+    return {key for key in keys if key}
+
+
+def _is_duplicate(
+    result: Dict[str, Any],
+    kept_keys: set,
+    kept_spans: List[Tuple[str, int, int]],
+) -> bool:
+    """Same ticket/meeting id or text seen before, or a largely overlapping meeting window."""
+    if _dedupe_keys(result) & kept_keys:
+        return True
+
+    span = _span(result)
+    if span is not None:
+        meeting_id, start, end = span
+        for kept_meeting, kept_start, kept_end in kept_spans:
+            if kept_meeting != meeting_id:
+                continue
+            overlap = min(end, kept_end) - max(start, kept_start)
+            shorter = min(end - start, kept_end - kept_start) or 1
+            if overlap / shorter > DUPLICATE_OVERLAP:
+                return True
+    return False
+
+
+def _compact_result(result: Dict[str, Any], text: str) -> Dict[str, Any]:
+    metadata = result.get("metadata", {})
+    fields = MEETING_FIELDS if result.get("type") == "meeting" else JIRA_FIELDS
+    packed = {
+        "id": result.get("id"),
+        "type": result.get("type"),
+        "score": round(float(result.get("score", 0)), 4),
+    }
+    packed_metadata = {field: metadata[field] for field in fields if metadata.get(field)}
+    if text:
+        key = "raw_text" if result.get("type") == "meeting" else "text_snippet"
+        packed_metadata[key] = text
+    packed["metadata"] = packed_metadata
+    return packed
+
+
+def pack_search_results(
+    response: Dict[str, Any],
+    token_budget: int = SEARCH_RESULT_TOKEN_BUDGET,
+    max_snippet_chars: int = SNIPPET_MAX_CHARS,
+) -> str:
+    """
+    Serialize a search response for the agent within a token budget.
+
+    Results are taken in score order, duplicates across sources are dropped,
+    each result's text is cut to an excerpt around the query match and only
+    the useful metadata is kept. Results stop being added once the budget is
+    spent; the last one may be shortened to fit.
+
+    Args:
+        response: Dict with "query" and "results" as built by process_knowledge_search_results
+        token_budget: Approximate maximum tokens for the returned JSON
+        max_snippet_chars: Maximum excerpt length per result
+
+    Returns:
+        Compact JSON string with the same top-level keys as the input, plus
+        "omitted_count" when results were dropped for space or as duplicates
+    """
+    query = response.get("query", "")
+    results = sorted(response.get("results", []), key=lambda r: r.get("score", 0), reverse=True)
+
+    packed = {key: value for key, value in response.items() if key != "results"}
+    packed["results"] = []
+    used_tokens = estimate_tokens(_dumps(packed)) + 8  # Room for count fields
+    kept_keys = set()
+    kept_spans = []
+    omitted = 0
+
+    for result in results:
+        if _is_duplicate(result, kept_keys, kept_spans):
+            omitted += 1
+            continue
+
+        text = excerpt(_result_text(result), query, max_snippet_chars)
+        entry = _compact_result(result, text)
+        cost = estimate_tokens(_dumps(entry))
+        remaining = token_budget - used_tokens
+        if cost > remaining:
+            # Shorten the excerpt to whatever space is left
+            overhead = cost - estimate_tokens(_dumps(text))
+            allowed_chars = (remaining - overhead) * CHARS_PER_TOKEN
+            if not text or allowed_chars < MIN_SNIPPET_CHARS:
+                omitted += 1
+                continue
+            text = excerpt(text, query, allowed_chars)
+            entry = _compact_result(result, text)
+            cost = estimate_tokens(_dumps(entry))
+            if cost > remaining:
+                omitted += 1
+                continue
+
+        packed["results"].append(entry)
+        used_tokens += cost
+        kept_keys.update(_dedupe_keys(result))
+        span = _span(result)
+        if span is not None:
+            kept_spans.append(span)
+
+    packed["results_count"] = len(packed["results"])
+    if omitted:
+        packed["omitted_count"] = omitted
+    return _dumps(packed)
@@ -2,11 +2,14 @@
 
 import json
 import os
-import requests
 from requests.auth import HTTPBasicAuth
 import sys
 from dotenv import load_dotenv
 
+# Allow importing shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import http_client
+
 # --- Configuration ---
 # Load sensitive information from environment variables
 # You MUST set these environment variables before running the script:
@@ -125,7 +128,7 @@ def create_jira_ticket(payload, domain, email, token):
         "Content-Type": "application/json"
     }
     
-    response = requests.post(api_url, headers=headers, auth=auth, json=payload)
+    response = http_client.post(api_url, headers=headers, auth=auth, json=payload)
     
     if response.status_code == 201:
         print(f"Success: Created ticket {response.json()['key']} - Summary: {payload['fields']['summary']}")
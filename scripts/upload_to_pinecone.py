@@ -1,14 +1,28 @@
 import os
-import re
+import sys
 import json
+import hashlib
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from datetime import datetime
 from tqdm.auto import tqdm  # For progress bars
 
 from pinecone import Pinecone, ServerlessSpec
 from openai import OpenAI
 
+# Allow importing shared modules from the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from embedding_store import EmbeddingStore
+from knowledge_corpus import (
+    INGESTION_MANIFEST_PATH,
+    JIRA_TICKETS_PATH,
+    MEETING_TRANSCRIPTS_PATH,
+    build_jira_items,
+    build_meeting_items,
+)
+from meeting_store import MEETING_MAP_PATH
+from vector_store import LOCAL_VECTOR_STORE_PATH
+
 # --- Configuration ---
 PINECONE_INDEX_NAME = "meeting-asst-spc"
 OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
@@ -19,10 +33,31 @@ EMBEDDING_DIMENSION = 1536
 PINECONE_CLOUD = "aws" # Specify your cloud provider
 PINECONE_REGION = "us-east-1" # Specify your region
 
-MEETING_TRANSCRIPTS_PATH = "data/meeting_transcripts.txt"
-JIRA_TICKETS_PATH = "data/jira_tickets.json"
 UPSERT_BATCH_SIZE = 100 # Upsert vectors in batches
 
+# Embedding requests carry many texts each; batches are cut by estimated tokens
+# (OpenAI allows 2048 inputs and ~300k tokens per request)
+EMBEDDING_BATCH_MAX_ITEMS = 512
+EMBEDDING_BATCH_MAX_TOKENS = 200_000
+EMBEDDING_WORKERS = 4 # Embedding requests in flight at once
+CHARS_PER_TOKEN = 4 # Rough estimate; avoids a tokenizer dependency
+
+# Local embedding store (read by knowledge_search's "local" backend)
+# --local-only skips Pinecone entirely; --float16 halves the store's size on disk
+LOCAL_ONLY = "--local-only" in sys.argv
+LOCAL_STORE_DTYPE = "float16" if "--float16" in sys.argv else "float32"
+
+# The ingestion manifest (INGESTION_MANIFEST_PATH) stores, per vector id, a
+# content hash and the backends the vector was written to, so items unchanged
+# in every backend of this run are skipped. Rewriting it also tells running
+# assistants to drop cached search results, so it is only written on changes.
+# --full ignores the manifest and re-embeds everything
+FULL_REINDEX = "--full" in sys.argv
+MANIFEST_VERSION = 2
+
+# Backends this run writes to
+BACKENDS = ["local"] if LOCAL_ONLY else ["local", "pinecone"]
+
 # --- Environment Variables ---
 # Ensure you have these set in your environment
 # export PINECONE_API_KEY="YOUR_PINECONE_API_KEY"
@@ -31,15 +66,17 @@ load_dotenv()
 pinecone_api_key = os.getenv("PINECONE_API_KEY")
 openai_api_key = os.getenv("OPENAI_API_KEY")
 
-if not pinecone_api_key:
+if not pinecone_api_key and not LOCAL_ONLY:
     raise ValueError("PINECONE_API_KEY environment variable not set.")
 if not openai_api_key:
     raise ValueError("OPENAI_API_KEY environment variable not set.")
 
 # --- Initialize Clients ---
 try:
-    print("Initializing Pinecone client...")
-    pc = Pinecone(api_key=pinecone_api_key)
+    pc = None
+    if not LOCAL_ONLY:
+        print("Initializing Pinecone client...")
+        pc = Pinecone(api_key=pinecone_api_key)
     print("Initializing OpenAI client...")
     client = OpenAI(api_key=openai_api_key)
 except Exception as e:
@@ -58,6 +95,232 @@ def get_embedding(text, model=OPENAI_EMBEDDING_MODEL):
         # Consider adding retry logic here if needed
         return None
 
+def get_embeddings(texts, model=OPENAI_EMBEDDING_MODEL):
+    """Generates embeddings for a batch of texts in a single OpenAI API call."""
+    try:
+        inputs = [text.replace("\n", " ") for text in texts] # Recommended by OpenAI
+        response = client.embeddings.create(input=inputs, model=model)
+        # Results carry their input position; sort in case they arrive out of order
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    except Exception as e:
+        print(f"Error getting embeddings for batch of {len(texts)} texts - {e}")
+        return None
+
+def make_embedding_batches(items):
+    """Splits items into batches bounded by item count and estimated token count."""
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for item in items:
+        tokens = len(item["text"]) // CHARS_PER_TOKEN + 1
+        if batch and (len(batch) >= EMBEDDING_BATCH_MAX_ITEMS or batch_tokens + tokens > EMBEDDING_BATCH_MAX_TOKENS):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+def embed_batch(batch):
+    """Embeds one batch, falling back to per-item requests if the batch call fails."""
+    embeddings = get_embeddings([item["text"] for item in batch])
+    if embeddings is None:
+        embeddings = [get_embedding(item["text"]) for item in batch]
+
+    vectors = []
+    for item, embedding in zip(batch, embeddings):
+        if embedding is None:
+            print(f"Skipping {item['id']} due to embedding error.")
+            continue
+        vectors.append({"id": item["id"], "values": embedding, "metadata": item["metadata"]})
+    return vectors
+
+def upsert_in_chunks(index, embedding_store, vectors, label):
+    """Upserts vectors in UPSERT_BATCH_SIZE chunks (Pinecone caps request size).
+
+    Returns the ids that were written successfully.
+    """
+    upserted_ids = []
+    for start in range(0, len(vectors), UPSERT_BATCH_SIZE):
+        chunk = vectors[start:start + UPSERT_BATCH_SIZE]
+        try:
+            upsert_vectors(index, embedding_store, chunk)
+            upserted_ids.extend(v["id"] for v in chunk)
+        except Exception as e:
+            print(f"Error upserting {label} batch: {e}")
+            # Failed items stay out of the manifest, so the next run retries them
+    return upserted_ids
+
+def embed_and_upsert(items, index, embedding_store, label):
+    """
+    Embeds items in batches and upserts them, overlapping the two stages.
+
+    Embedding batches run on a small thread pool while a single upsert worker
+    writes finished batches, so network time for both is overlapped.
+    Returns a dict of throughput statistics.
+    """
+    batches = make_embedding_batches(items)
+    print(f"Embedding {len(items)} {label} items in {len(batches)} batches...")
+    start_time = time.perf_counter()
+    embedded = 0
+    upserted_ids = []
+
+    with ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS) as embed_pool, \
+            ThreadPoolExecutor(max_workers=1) as upsert_pool:
+        embed_futures = [embed_pool.submit(embed_batch, batch) for batch in batches]
+        upsert_futures = []
+        for future in tqdm(embed_futures, desc=f"Embedding {label} batches"):
+            vectors = future.result()
+            embedded += len(vectors)
+            upsert_futures.append(upsert_pool.submit(upsert_in_chunks, index, embedding_store, vectors, label))
+        embed_seconds = time.perf_counter() - start_time
+        for future in upsert_futures:
+            upserted_ids.extend(future.result())
+
+    total_seconds = time.perf_counter() - start_time
+    stats = {
+        "items": len(items),
+        "embedded": embedded,
+        "batches": len(batches),
+        "embed_seconds": embed_seconds,
+        "total_seconds": total_seconds,
+        "items_per_second": embedded / total_seconds if total_seconds > 0 else 0.0,
+        "upserted_ids": upserted_ids,
+    }
+    print(
+        f"{label}: {embedded}/{len(items)} items in {total_seconds:.2f}s "
+        f"({stats['items_per_second']:.1f} items/s, {len(batches)} embedding calls)"
+    )
+    return stats
+
+# --- Incremental Reindexing ---
+def load_manifest():
+    """Loads the id -> {"hash", "backends"} manifest from the last run."""
+    if FULL_REINDEX or not os.path.exists(INGESTION_MANIFEST_PATH):
+        return {}
+    try:
+        with open(INGESTION_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"Warning: Could not read manifest {INGESTION_MANIFEST_PATH} ({e}). Reindexing everything.")
+        return {}
+    items = data.get("items", {})
+    if data.get("version", 1) < MANIFEST_VERSION:
+        # Version 1 stored only hashes; the local store was always written but
+        # Pinecone may not have been, so those items are upserted to it again
+        return {vector_id: {"hash": value, "backends": ["local"]} for vector_id, value in items.items()}
+    return items
+
+def save_manifest(manifest):
+    """Writes the manifest atomically."""
+    tmp_path = INGESTION_MANIFEST_PATH + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": MANIFEST_VERSION, "items": manifest}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, INGESTION_MANIFEST_PATH)
+
+def content_hash(item):
+    """Hashes everything that ends up in the index for an item: model, text and metadata."""
+    payload = json.dumps(
+        {"model": OPENAI_EMBEDDING_MODEL, "text": item["text"], "metadata": item["metadata"]},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def delete_vectors(index, embedding_store, ids):
+    """Deletes vectors from Pinecone (if connected) and the local store."""
+    if index is not None:
+        for start in range(0, len(ids), UPSERT_BATCH_SIZE):
+            index.delete(ids=ids[start:start + UPSERT_BATCH_SIZE])
+    if embedding_store is not None:
+        embedding_store.delete(ids)
+
+def delete_legacy_meeting_vectors(index):
+    """
+    Deletes the whole-meeting vectors ("meeting-<N>") written before meetings were split into windows.
+
+    Those ids were never recorded in a manifest, so sync_items cannot find
+    them. Meeting ids come from meeting_map.json; deleting ids that do not
+    exist is a no-op in Pinecone. Returns the number of ids deleted.
+    """
+    try:
+        with open(MEETING_MAP_PATH, 'r', encoding='utf-8') as f:
+            legacy_ids = sorted(json.load(f))
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Warning: Could not read {MEETING_MAP_PATH} ({e}). Legacy meeting vectors not deleted.")
+        return 0
+    try:
+        delete_vectors(index, None, legacy_ids)
+    except Exception as e:
+        print(f"Error deleting legacy meeting vectors: {e}")
+        return 0
+    print(f"Deleted {len(legacy_ids)} legacy whole-meeting vectors from Pinecone (if present).")
+    return len(legacy_ids)
+
+def sync_items(items, id_prefix, index, embedding_store, manifest, label):
+    """
+    Brings the index in line with items, embedding only new or changed ones.
+
+    Items are compared with the manifest by content hash. An item whose hash
+    matches but which was never written to one of this run's BACKENDS (e.g.
+    after a --local-only run) is written again. Manifest ids with id_prefix
+    that no longer appear in items are deleted from this run's backends. The
+    manifest is updated in place. Returns a dict of
+    added/updated/resynced/unchanged/deleted counts.
+    """
+    hashes = {item["id"]: content_hash(item) for item in items}
+    added = []
+    updated = []
+    resynced = []
+    for item in items:
+        entry = manifest.get(item["id"])
+        if entry is None:
+            added.append(item)
+        elif entry["hash"] != hashes[item["id"]]:
+            updated.append(item)
+        elif set(BACKENDS) - set(entry["backends"]):
+            resynced.append(item)
+    unchanged = len(items) - len(added) - len(updated) - len(resynced)
+    removed = [
+        vector_id for vector_id, entry in manifest.items()
+        if vector_id.startswith(id_prefix) and vector_id not in hashes
+        and set(entry["backends"]) & set(BACKENDS)
+    ]
+
+    stats = {"added": len(added), "updated": len(updated), "resynced": len(resynced), "unchanged": unchanged, "deleted": 0}
+    print(
+        f"{label}: {len(added)} new, {len(updated)} changed, {len(resynced)} missing from a backend, "
+        f"{unchanged} unchanged, {len(removed)} removed"
+    )
+
+    changed = added + updated + resynced
+    if changed:
+        stats.update(embed_and_upsert(changed, index, embedding_store, label))
+        for vector_id in stats["upserted_ids"]:
+            entry = manifest.get(vector_id)
+            backends = set(BACKENDS)
+            if entry is not None and entry["hash"] == hashes[vector_id]:
+                backends.update(entry["backends"])
+            manifest[vector_id] = {"hash": hashes[vector_id], "backends": sorted(backends)}
+
+    if removed:
+        try:
+            delete_vectors(index, embedding_store, removed)
+            for vector_id in removed:
+                # Backends this run did not write (e.g. Pinecone on --local-only) still hold the vector
+                remaining = sorted(set(manifest[vector_id]["backends"]) - set(BACKENDS))
+                if remaining:
+                    manifest[vector_id]["backends"] = remaining
+                else:
+                    del manifest[vector_id]
+            stats["deleted"] = len(removed)
+        except Exception as e:
+            print(f"Error deleting removed {label} vectors: {e}")
+
+    stats.setdefault("embedded", 0)
+    return stats
+
 # --- Ensure Pinecone Index Exists ---
 def create_pinecone_index():
     """Checks if the index exists and creates it if not."""
@@ -131,9 +394,21 @@ def create_pinecone_index():
         print(f"Error connecting to index '{PINECONE_INDEX_NAME}': {e}")
         exit(1)
 
+# --- Write Vectors to Pinecone and the Local Store ---
+def upsert_vectors(index, embedding_store, vectors):
+    """Upserts a batch of vectors to Pinecone (if connected) and appends it to the local store."""
+    if index is not None:
+        index.upsert(vectors=vectors)
+    if embedding_store is not None:
+        embedding_store.append(
+            [v["id"] for v in vectors],
+            [v["values"] for v in vectors],
+            [v["metadata"] for v in vectors],
+        )
+
 # --- Process Meeting Transcripts ---
-def process_meeting_transcripts(index):
-    """Reads transcripts, chunks by meeting, generates embeddings, and upserts."""
+def process_meeting_transcripts(index, embedding_store=None, manifest=None):
+    """Reads transcripts, splits each meeting into overlapping speaker-turn windows, generates embeddings, and upserts."""
     print(f"\nProcessing meeting transcripts from: {MEETING_TRANSCRIPTS_PATH}")
     try:
         with open(MEETING_TRANSCRIPTS_PATH, 'r', encoding='utf-8') as f:
@@ -145,81 +420,15 @@ def process_meeting_transcripts(index):
         print(f"Error reading file {MEETING_TRANSCRIPTS_PATH}: {e}")
         return
 
-    # Split into meetings using the header format
-    # Regex captures meeting number and date string
-    meeting_headers = list(re.finditer(r"### Meeting (\d+): (.*?)\n", content))
-    vectors_to_upsert = []
-
-    print(f"Found {len(meeting_headers)} meetings.")
-
-    for i, header_match in enumerate(tqdm(meeting_headers, desc="Processing Meetings")):
-        meeting_number = int(header_match.group(1))
-        date_str = header_match.group(2).strip()
-
-        # Extract meeting content
-        start_index = header_match.end()
-        end_index = meeting_headers[i+1].start() if i + 1 < len(meeting_headers) else len(content)
-        meeting_text = content[start_index:end_index].strip()
-
-        if not meeting_text:
-            print(f"Warning: Meeting {meeting_number} has no content. Skipping.")
-            continue
-
-        # Parse date string
-        try:
-            # Assuming format "Month Day, Year" e.g., "February 15, 2025"
-            meeting_date_obj = datetime.strptime(date_str, "%B %d, %Y")
-            meeting_date_iso = meeting_date_obj.strftime("%Y-%m-%d")
-        except ValueError:
-            print(f"Warning: Could not parse date '{date_str}' for meeting {meeting_number}. Skipping date metadata.")
-            meeting_date_iso = None # Or handle as needed
-
-        # Generate embedding
-        embedding = get_embedding(meeting_text)
-        if embedding is None:
-            print(f"Skipping meeting {meeting_number} due to embedding error.")
-            continue
-
-        # Prepare metadata
-        metadata = {
-            "source": "meeting_transcript",
-            "meeting_number": meeting_number,
-            "text_snippet": meeting_text[:200] + "..." # Add a snippet for context
-        }
-        if meeting_date_iso:
-            metadata["meeting_date"] = meeting_date_iso
-
-        # Prepare vector for upsert
-        vector_id = f"meeting-{meeting_number}"
-        vectors_to_upsert.append({
-            "id": vector_id,
-            "values": embedding,
-            "metadata": metadata
-        })
-
-        # Upsert in batches
-        if len(vectors_to_upsert) >= UPSERT_BATCH_SIZE:
-            print(f"Upserting batch of {len(vectors_to_upsert)} meeting vectors...")
-            try:
-                index.upsert(vectors=vectors_to_upsert)
-                vectors_to_upsert = [] # Clear batch
-            except Exception as e:
-                print(f"Error upserting meeting batch: {e}")
-                # Decide how to handle failed batches (e.g., retry, log)
-
-
-    # Upsert any remaining vectors
-    if vectors_to_upsert:
-        print(f"Upserting final batch of {len(vectors_to_upsert)} meeting vectors...")
-        try:
-            index.upsert(vectors=vectors_to_upsert)
-        except Exception as e:
-            print(f"Error upserting final meeting batch: {e}")
+    items = build_meeting_items(content)
+    print(f"Found {len({item['metadata']['meeting_id'] for item in items})} meetings ({len(items)} windows).")
 
+    stats = sync_items(items, "meeting-", index, embedding_store, manifest if manifest is not None else {}, "meeting")
     print("Finished processing meeting transcripts.")
+    return stats
 
 # --- Process Jira Tickets ---
-def process_jira_tickets(index):
+def process_jira_tickets(index, embedding_store=None, manifest=None):
     """Reads Jira tickets, generates embeddings, and upserts."""
     print(f"\nProcessing Jira tickets from: {JIRA_TICKETS_PATH}")
     try:
@@ -235,103 +444,58 @@ def process_jira_tickets(index):
         print(f"Error reading file {JIRA_TICKETS_PATH}: {e}")
         return
 
-    vectors_to_upsert = []
     print(f"Found {len(tickets)} Jira tickets.")
+    items = build_jira_items(tickets)
 
-    for ticket in tqdm(tickets, desc="Processing Jira Tickets"):
-        try:
-            ticket_id = ticket.get("key")
-            fields = ticket.get("fields", {})
-            summary = fields.get("summary", "")
-            description = fields.get("description", "")
-            status = fields.get("status", {}).get("name")
-            assignee = fields.get("assignee", {}).get("displayName")
-            reporter = fields.get("reporter", {}).get("displayName")
-            created_str = fields.get("created") # e.g., "2025-02-10T10:23:54.000+0000"
-            labels = fields.get("labels", [])
-
-            if not ticket_id or not (summary or description):
-                print(f"Warning: Skipping ticket due to missing ID, summary, or description: {ticket.get('id')}")
-                continue
-
-            # Combine relevant text fields for embedding
-            text_to_embed = f"Summary: {summary}\nDescription: {description}"
-            if labels:
-                text_to_embed += f"\nLabels: {', '.join(labels)}"
-
-            # Generate embedding
-            embedding = get_embedding(text_to_embed)
-            if embedding is None:
-                print(f"Skipping ticket {ticket_id} due to embedding error.")
-                continue
-
-            # Parse created date
-            created_date_iso = None
-            if created_str:
-                try:
-                    # Parse ISO 8601 format, ignoring timezone for simplicity here
-                    created_date_obj = datetime.fromisoformat(created_str.split('.')[0]) # Remove fractional seconds
-                    created_date_iso = created_date_obj.strftime("%Y-%m-%d")
-                except ValueError:
-                    print(f"Warning: Could not parse date '{created_str}' for ticket {ticket_id}. Skipping date metadata.")
-
-
-            # Prepare metadata
-            metadata = {
-                "source": "jira_ticket",
-                "ticket_id": ticket_id,
-                "summary": summary,
-                "status": status,
-                "assignee": assignee,
-                "reporter": reporter,
-                "labels": labels,
-                "text_snippet": text_to_embed[:200] + "..."
-            }
-            if created_date_iso:
-                metadata["created_date"] = created_date_iso
-
-             # Add other relevant fields as needed, ensure they are JSON serializable
-
-            # Prepare vector for upsert
-            vector_id = f"jira-{ticket_id}"
-            vectors_to_upsert.append({
-                "id": vector_id,
-                "values": embedding,
-                "metadata": metadata
-            })
-
-            # Upsert in batches
-            if len(vectors_to_upsert) >= UPSERT_BATCH_SIZE:
-                print(f"Upserting batch of {len(vectors_to_upsert)} Jira ticket vectors...")
-                try:
-                    index.upsert(vectors=vectors_to_upsert)
-                    vectors_to_upsert = [] # Clear batch
-                except Exception as e:
-                    print(f"Error upserting Jira batch: {e}")
-                    # Decide how to handle failed batches
-
-        except Exception as e:
-            print(f"Error processing ticket {ticket.get('id', 'UNKNOWN')}: {e}")
-            continue # Skip to the next ticket
-
-    # Upsert any remaining vectors
-    if vectors_to_upsert:
-        print(f"Upserting final batch of {len(vectors_to_upsert)} Jira ticket vectors...")
-        try:
-            index.upsert(vectors=vectors_to_upsert)
-        except Exception as e:
-            print(f"Error upserting final Jira batch: {e}")
-
+    stats = sync_items(items, "jira-", index, embedding_store, manifest if manifest is not None else {}, "Jira ticket")
     print("Finished processing Jira tickets.")
+    return stats
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    pinecone_index = create_pinecone_index()
-
-    if pinecone_index:
-        process_meeting_transcripts(pinecone_index)
-        process_jira_tickets(pinecone_index)
-
+    pinecone_index = None if LOCAL_ONLY else create_pinecone_index()
+
+    if pinecone_index or LOCAL_ONLY:
+        manifest = load_manifest()
+        if pinecone_index is not None and not manifest:
+            # Without a manifest (an index built by an older version of this script, or --full),
+            # the old whole-meeting vectors would otherwise stay in Pinecone next to the windows
+            delete_legacy_meeting_vectors(pinecone_index)
+        if FULL_REINDEX or not EmbeddingStore.exists(LOCAL_VECTOR_STORE_PATH):
+            # A missing local store cannot be patched incrementally; rebuild everything
+            if manifest:
+                print("Local embedding store missing; reindexing everything.")
+            manifest = {}
+            embedding_store = EmbeddingStore.create(
+                LOCAL_VECTOR_STORE_PATH, EMBEDDING_DIMENSION, LOCAL_STORE_DTYPE
+            )
+        else:
+            embedding_store = EmbeddingStore(LOCAL_VECTOR_STORE_PATH)
+        print(f"Writing local embedding store to: {LOCAL_VECTOR_STORE_PATH} ({embedding_store.dtype})")
+
+        manifest_before = json.dumps(manifest, sort_keys=True)
+        run_start = time.perf_counter()
+        meeting_stats = process_meeting_transcripts(pinecone_index, embedding_store, manifest)
+        jira_stats = process_jira_tickets(pinecone_index, embedding_store, manifest)
+        run_seconds = time.perf_counter() - run_start
+
+        # Updated and resynced items were appended; drop their superseded rows so the store stays mmap-able
+        if any(stats and (stats["updated"] or stats["resynced"]) for stats in (meeting_stats, jira_stats)):
+            embedding_store.compact()
+        # A rewrite clears every running assistant's search cache, so skip it on no-op runs
+        if json.dumps(manifest, sort_keys=True) != manifest_before or not os.path.exists(INGESTION_MANIFEST_PATH):
+            save_manifest(manifest)
+        else:
+            print("Nothing changed; manifest left as is.")
+
+        all_stats = [stats for stats in (meeting_stats, jira_stats) if stats]
+        total_embedded = sum(stats["embedded"] for stats in all_stats)
+        print("\n--- Reindex Report ---")
+        for key in ("added", "updated", "resynced", "unchanged", "deleted"):
+            print(f"{key.capitalize()}: {sum(stats[key] for stats in all_stats)}")
+        print(f"Items embedded and upserted: {total_embedded}")
+        print(f"Elapsed: {run_seconds:.2f}s ({total_embedded / run_seconds if run_seconds > 0 else 0.0:.1f} items/s)")
+        print(f"Local embedding store contains {embedding_store.count} vectors.")
         print("\nScript finished.")
         # Optional: Print final index stats
         # try:
@@ -0,0 +1,210 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from embedding_cache import normalize_text
+from lexical_index import STOPWORDS, tokenize
+
+SEARCH_CACHE_TTL_SECONDS = float(os.environ.get("SEARCH_CACHE_TTL_SECONDS", "300"))
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", "256"))
+
+# Words that change what a query asks for; such queries only match exactly
+QUALIFIER_TERMS = frozenset({"not", "no", "nor", "never", "without", "except", "before", "after"})
+# Words that say nothing about the topic itself ("wifi issues" is about "wifi")
+GENERIC_TERMS = frozenset(
+    {"issue", "problem", "status", "update", "latest", "question", "info", "information", "help", "discussion"}
+)
+
+
+def query_terms(query: str) -> FrozenSet[str]:
+    """
+    Return the content terms of a query: stopwords dropped, plural "s" stripped.
+
+    Word order is lost, so this is for matching topics, not for exact cache keys.
+    """
+    terms = set()
+    for token in tokenize(query):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+            token = token[:-1]
+        terms.add(token)
+    return frozenset(terms)
+
+
+class SearchResultCache:
+    """In-memory TTL + LRU cache of search_knowledge results"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS,
+        max_size: int = SEARCH_CACHE_SIZE,
+        watch_paths: Iterable[str] = (),
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds: Seconds an entry stays valid
+            max_size: Maximum number of entries before the least recently used is evicted
+            watch_paths: Files whose modification (e.g. by the ingestion script)
+                invalidates every entry
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.watch_paths = tuple(watch_paths)
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # Warmed entries that may answer related queries: key -> (scope, topic, terms)
+        self.topics: Dict[str, Tuple[str, str, FrozenSet[str]]] = {}
+        self.lock = threading.Lock()
+        self._watch_mtimes = self._read_mtimes()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "topic_hits": 0,
+        }
+
+    @staticmethod
+    def make_key(query: str, top_k: int, **filters: Any) -> str:
+        """Build the cache key from the normalized query, top_k and any filters."""
+        return json.dumps(
+            [normalize_text(query), top_k, filters], sort_keys=True, default=str
+        )
+
+    @staticmethod
+    def make_scope(top_k: int, **filters: Any) -> str:
+        """Build the part of the key a topic match must share: top_k and filters."""
+        return json.dumps([top_k, filters], sort_keys=True, default=str)
+
+    def _read_mtimes(self) -> Tuple[Optional[float], ...]:
+        mtimes = []
+        for path in self.watch_paths:
+            try:
+                mtimes.append(os.path.getmtime(path))
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def _check_watched_files(self) -> None:
+        if not self.watch_paths:
+            return
+        mtimes = self._read_mtimes()
+        if mtimes != self._watch_mtimes:
+            self._watch_mtimes = mtimes
+            self._clear("index files changed")
+
+    def _clear(self, reason: str) -> None:
+        if self.entries:
+            print(f"Search cache invalidated ({reason}); dropped {len(self.entries)} entries")
+        self.entries.clear()
+        self.topics.clear()
+        self.stats["invalidations"] += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a result.
+
+        Returns:
+            The cached result, or None on a miss or expired entry
+        """
+        with self.lock:
+            self._check_watched_files()
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._drop(key)
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    def _drop(self, key: str) -> None:
+        del self.entries[key]
+        self.topics.pop(key, None)
+
+    def add_topic(self, key: str, scope: str, topic: str) -> None:
+        """
+        Let a cached entry answer related queries as well as its exact key.
+
+        Args:
+            key: Key of an entry already stored (no-op if it is not)
+            scope: make_scope() value of the search that produced it
+            topic: The query the entry was searched for
+        """
+        terms = query_terms(topic)
+        with self.lock:
+            if key in self.entries and terms:
+                self.topics[key] = (scope, topic, terms)
+
+    def get_covering(self, query: str, scope: str) -> Optional[Tuple[str, Any]]:
+        """
+        Find a warmed topic that answers the query.
+
+        A topic matches when all of its terms appear in the query and it covers
+        every non-generic term of the query, so a topic warmed as "wifi"
+        answers "WiFi issues" but not "WiFi connectivity", and "SPC-042" does
+        not answer "SPC-042 and SPC-050". Queries with a qualifier such as
+        "not" or "before" never match a topic. The most specific match wins.
+
+        Returns:
+            (topic, cached result), or None if no warmed topic matches
+        """
+        if QUALIFIER_TERMS.intersection(tokenize(query)):
+            return None
+        terms = query_terms(query)
+        specific = terms - GENERIC_TERMS
+        if not specific:
+            return None
+        with self.lock:
+            best_key = None
+            best_size = 0
+            for key, (topic_scope, _, topic_terms) in self.topics.items():
+                if topic_scope != scope or not topic_terms <= terms or not specific <= topic_terms:
+                    continue
+                if len(topic_terms) > best_size:
+                    best_key, best_size = key, len(topic_terms)
+            if best_key is None:
+                return None
+            stored_at, value = self.entries[best_key]
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                self._drop(best_key)
+                self.stats["expired"] += 1
+                return None
+            self.entries.move_to_end(best_key)
+            self.stats["topic_hits"] += 1
+            return self.topics[best_key][1], value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a result, evicting the least recently used entries beyond max_size."""
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self._drop(next(iter(self.entries)))
+                self.stats["evictions"] += 1
+
+    def invalidate(self, reason: str = "manual") -> None:
+        """Drop every entry, e.g. after the underlying data changed."""
+        with self.lock:
+            self._clear(reason)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters and the current size."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self.entries)
+        # A topic hit follows a miss on the exact key
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["topic_hits"]) / lookups if lookups else 0.0
+        return stats
@@ -1,3 +1,4 @@
+import asyncio
 import json
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Union
@@ -5,7 +6,7 @@ from typing import Any, Dict, List, Optional, Union
 from calendar_invite import create_and_send_calendar_invite
 from get_employee_email import get_email_from_assignee
 from jira_ticket import create_jira_ticket
-from knowledge_search import search_knowledge
+from knowledge_search import invalidate_search_cache, search_knowledge, search_knowledge_async
 from send_email import send_email
 
 
@@ -57,6 +58,21 @@ class ToolManager:
         else:
             return {"error": f"Unknown tool: {tool_name}"}
 
+    async def execute_tool_async(self, tool_name, tool_args):
+        """
+        Async version of execute_tool.
+
+        search_knowledge runs natively async; the Jira, calendar and email tools
+        use blocking clients and run on a worker thread.
+        """
+        if tool_name == "search_knowledge":
+            return await self.search_knowledge_async(tool_args["query"])
+        return await asyncio.to_thread(self.execute_tool, tool_name, tool_args)
+
+    async def search_knowledge_async(self, query: str):
+        """Async version of search_knowledge, returning the same JSON string"""
+        return await search_knowledge_async(query)
+
     def search_knowledge(self, query: str):
         """
         Execute the search_knowledge tool and handle the JSON string response format.
@@ -104,6 +120,9 @@ class ToolManager:
                 labels=labels,
                 assignee=assignee,
             )
+            if result.get("success"):
+                # Cached searches would not reflect the new ticket
+                invalidate_search_cache("Jira ticket created")
             # Convert the result to a JSON string
             return json.dumps(result)
         except Exception as e:
@@ -0,0 +1,92 @@
+import re
+from typing import Any, Dict, List
+
+# Speaker turns in the transcripts start with a bolded name, e.g. "**Lidia H**: ..."
+SPEAKER_TURN_PATTERN = re.compile(r"^\*\*(?P<speaker>[^*\n]+)\*\*:", re.MULTILINE)
+
+CHUNK_MAX_CHARS = 1200  # Target window size (~300 tokens)
+CHUNK_OVERLAP_TURNS = 1  # Turns repeated at the start of the next window
+
+
+def split_speaker_turns(text: str) -> List[Dict[str, Any]]:
+    """
+    Split a meeting transcript into speaker turns.
+
+    Args:
+        text: The meeting text (as stored in meeting_map.json)
+
+    Returns:
+        List of turns with "speaker", "start" and "end" character offsets into text.
+        Text before the first speaker marker becomes a turn with speaker None.
+    """
+    markers = list(SPEAKER_TURN_PATTERN.finditer(text))
+    turns = []
+    if not markers:
+        if text.strip():
+            turns.append({"speaker": None, "start": 0, "end": len(text.rstrip())})
+        return turns
+
+    if text[: markers[0].start()].strip():
+        turns.append({"speaker": None, "start": 0, "end": len(text[: markers[0].start()].rstrip())})
+
+    for i, marker in enumerate(markers):
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(text)
+        # Trim the blank lines between turns so offsets cover only the turn itself
+        end = marker.start() + len(text[marker.start():end].rstrip())
+        turns.append({"speaker": marker.group("speaker").strip(), "start": marker.start(), "end": end})
+    return turns
+
+
+def chunk_meeting(
+    text: str,
+    max_chars: int = CHUNK_MAX_CHARS,
+    overlap_turns: int = CHUNK_OVERLAP_TURNS,
+) -> List[Dict[str, Any]]:
+    """
+    Group speaker turns into overlapping windows for embedding.
+
+    Windows grow turn by turn until adding another would exceed max_chars (a
+    single long turn still forms its own window). Each new window starts
+    overlap_turns turns before the previous one ended, so context spanning a
+    boundary is retrievable from either side.
+
+    Args:
+        text: The meeting text
+        max_chars: Target maximum characters per window
+        overlap_turns: Number of turns shared between consecutive windows
+
+    Returns:
+        List of chunks with "chunk_index", "start_char", "end_char", "speakers" and "text"
+    """
+    turns = split_speaker_turns(text)
+    chunks = []
+    first = 0
+    while first < len(turns):
+        last = first
+        while (
+            last + 1 < len(turns)
+            and turns[last + 1]["end"] - turns[first]["start"] <= max_chars
+        ):
+            last += 1
+
+        start_char = turns[first]["start"]
+        end_char = turns[last]["end"]
+        speakers = []
+        for turn in turns[first : last + 1]:
+            if turn["speaker"] and turn["speaker"] not in speakers:
+                speakers.append(turn["speaker"])
+        chunks.append(
+            {
+                "chunk_index": len(chunks),
+                "start_char": start_char,
+                "end_char": end_char,
+                "speakers": speakers,
+                "text": text[start_char:end_char],
+            }
+        )
+
+        if last + 1 >= len(turns):
+            break
+        # Always advance by at least one turn, even if the window was a single turn
+        first = max(first + 1, last + 1 - overlap_turns)
+    return chunks
@@ -0,0 +1,183 @@
+import os
+import threading
+from typing import Any, Dict, Optional
+
+# Transcript kept verbatim at the end of the prompt (~1500 tokens)
+TRANSCRIPT_TAIL_CHARS = int(os.environ.get("TRANSCRIPT_TAIL_CHARS", "6000"))
+# Older text is folded into the summary once at least this much has built up
+TRANSCRIPT_FOLD_CHARS = int(os.environ.get("TRANSCRIPT_FOLD_CHARS", "4000"))
+# Hard cap on verbatim text if summarization falls behind or fails
+MAX_VERBATIM_CHARS = int(os.environ.get("MAX_VERBATIM_CHARS", "16000"))
+SUMMARY_MAX_TOKENS = 512
+SUMMARY_MODEL = "claude-3-5-haiku-20241022"
+
+SUMMARY_PROMPT = """You maintain a running summary of a live meeting for an assistant who will answer questions about it.
+
+Current summary:
+{summary}
+
+New transcript segment:
+{segment}
+
+Rewrite the summary to include the new segment. Keep names, decisions, action items, owners, dates, ticket numbers and open questions. Drop small talk. Use short bullet points and stay under 300 words. Reply with the summary only."""
+
+
+class RollingTranscriptSummarizer:
+    """Folds older meeting transcript into a running summary in the background"""
+
+    def __init__(
+        self,
+        anthropic_client,
+        tail_chars: int = TRANSCRIPT_TAIL_CHARS,
+        fold_chars: int = TRANSCRIPT_FOLD_CHARS,
+        max_verbatim_chars: int = MAX_VERBATIM_CHARS,
+        model: str = SUMMARY_MODEL,
+    ):
+        """
+        Initialize the summarizer.
+
+        Args:
+            anthropic_client: Anthropic client used for the summary calls
+            tail_chars: Characters at the end of the transcript always kept verbatim
+            fold_chars: Minimum amount of older text to fold in one summary call
+            max_verbatim_chars: Upper bound on verbatim text in the prompt
+            model: Model used for summarization
+        """
+        self.anthropic_client = anthropic_client
+        self.tail_chars = tail_chars
+        self.fold_chars = fold_chars
+        self.max_verbatim_chars = max_verbatim_chars
+        self.model = model
+
+        self.lock = threading.Lock()
+        self.summary = ""
+        # Transcript[:summarized_upto] is covered by the summary
+        self.summarized_upto = 0
+        # First characters of the transcript, to detect it being replaced
+        self.transcript_prefix = ""
+        # Bumped on reset so a fold started on an old transcript is discarded
+        self.generation = 0
+        self.fold_thread: Optional[threading.Thread] = None
+        self.stats = {"folds": 0, "fold_errors": 0, "folded_chars": 0}
+
+    def reset(self) -> None:
+        """Forget the summary, e.g. when a new meeting starts."""
+        with self.lock:
+            self._reset_locked()
+
+    def _reset_locked(self) -> None:
+        self.summary = ""
+        self.summarized_upto = 0
+        self.transcript_prefix = ""
+        self.generation += 1
+
+    def update(self, transcript: str) -> None:
+        """
+        Note the latest transcript and start a background fold if enough old text built up.
+
+        Cheap enough to call on every new transcript segment.
+
+        Args:
+            transcript: The full meeting transcript so far
+        """
+        with self.lock:
+            if not transcript.startswith(self.transcript_prefix) or len(transcript) < self.summarized_upto:
+                # The transcript was replaced rather than appended to
+                self._reset_locked()
+            if not self.transcript_prefix:
+                self.transcript_prefix = transcript[:200]
+
+            if self.fold_thread is not None and self.fold_thread.is_alive():
+                return
+            fold_end = self._fold_boundary(transcript)
+            if fold_end - self.summarized_upto < self.fold_chars:
+                return
+
+            segment = transcript[self.summarized_upto : fold_end]
+            self.fold_thread = threading.Thread(
+                target=self._fold,
+                args=(self.summary, segment, fold_end, self.generation),
+                name="transcript-summarizer",
+                daemon=True,
+            )
+            self.fold_thread.start()
+
+    def _fold_boundary(self, transcript: str) -> int:
+        """End of the text to fold: tail_chars before the end, moved back to a line or word break."""
+        limit = len(transcript) - self.tail_chars
+        if limit <= self.summarized_upto:
+            return self.summarized_upto
+        for separator in ("\n", " "):
+            cut = transcript.rfind(separator, self.summarized_upto, limit)
+            if cut > self.summarized_upto:
+                return cut + 1
+        return limit
+
+    def _fold(self, summary: str, segment: str, fold_end: int, generation: int) -> None:
+        try:
+            response = self.anthropic_client.messages.create(
+                model=self.model,
+                max_tokens=SUMMARY_MAX_TOKENS,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": SUMMARY_PROMPT.format(
+                            summary=summary or "(empty)", segment=segment
+                        ),
+                    }
+                ],
+            )
+            new_summary = "".join(
+                block.text for block in response.content if block.type == "text"
+            ).strip()
+        except Exception as e:
+            print(f"Transcript summarization failed: {e}")
+            with self.lock:
+                self.stats["fold_errors"] += 1
+            return
+
+        with self.lock:
+            if generation != self.generation or not new_summary:
+                return
+            self.summary = new_summary
+            self.summarized_upto = fold_end
+            self.stats["folds"] += 1
+            self.stats["folded_chars"] += len(segment)
+        print(f"[Summarizer] Folded {len(segment)} characters into the running summary")
+
+    def build_context(self, transcript: str) -> str:
+        """
+        Build the transcript text for the agent prompt.
+
+        Args:
+            transcript: The full meeting transcript so far
+
+        Returns:
+            The running summary followed by the verbatim recent transcript, or
+            the transcript itself while nothing has been summarized yet
+        """
+        self.update(transcript)
+        with self.lock:
+            summary = self.summary
+            verbatim = transcript[self.summarized_upto :]
+
+        omitted = ""
+        if len(verbatim) > self.max_verbatim_chars:
+            # Summarization is behind; keep the most recent text within the cap
+            verbatim = verbatim[-self.max_verbatim_chars :]
+            omitted = "[... earlier discussion not yet summarized ...]\n"
+
+        if not summary:
+            return omitted + verbatim
+        return (
+            f"Summary of the earlier discussion:\n{summary}\n\n"
+            f"Most recent discussion (verbatim):\n{omitted}{verbatim}"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return fold counters and the current summary/verbatim split."""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["summary_chars"] = len(self.summary)
+            stats["summarized_upto"] = self.summarized_upto
+        return stats
@@ -1,17 +1,167 @@
-import requests
 import json
 import os
+import queue
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pyaudio
 import wave
 from io import BytesIO
 from datetime import datetime
 
+import http_client
+
+
+class VoiceActivitySegmenter:
+    """Energy-based voice activity detection that groups paInt16 frames into speech segments"""
+
+    def __init__(
+        self,
+        rate,
+        chunk,
+        energy_threshold=500,
+        min_segment_seconds=1.0,
+        max_segment_seconds=2.5,
+        pause_seconds=0.5,
+        max_pause_seconds=2.0,
+    ):
+        self.rate = rate
+        self.chunk = chunk
+        self.frame_seconds = chunk / rate
+        # RMS amplitude (int16 scale) above which a frame counts as speech
+        self.energy_threshold = energy_threshold
+        self.min_segment_seconds = min_segment_seconds
+        self.max_segment_seconds = max_segment_seconds
+        # Silence this long closes a segment at a natural pause
+        self.pause_seconds = pause_seconds
+        # Silence this long closes even a segment shorter than the minimum
+        self.max_pause_seconds = max_pause_seconds
+
+        self.frames = []
+        self.silence_run = 0.0
+        self.stats = {
+            "frames": 0,
+            "speech_frames": 0,
+            "segments": 0,
+            "skipped_seconds": 0.0,
+            "segment_seconds": 0.0,
+        }
+
+    def frame_energy(self, data):
+        """Compute the RMS energy of a raw paInt16 frame"""
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        if samples.size == 0:
+            return 0.0
+        return float(np.sqrt(np.mean(samples * samples)))
+
+    def process(self, data):
+        """
+        Feed one frame from the audio stream.
+
+        Returns:
+            A completed segment (list of frames) or None if the segment is still open
+        """
+        self.stats["frames"] += 1
+        is_speech = self.frame_energy(data) >= self.energy_threshold
+        if is_speech:
+            self.stats["speech_frames"] += 1
+
+        # Outside a segment, silence is dropped rather than uploaded
+        if not self.frames:
+            if is_speech:
+                self.frames.append(data)
+                self.silence_run = 0.0
+            else:
+                self.stats["skipped_seconds"] += self.frame_seconds
+            return None
+
+        if is_speech:
+            self.frames.append(data)
+            self.silence_run = 0.0
+        elif self.silence_run < self.pause_seconds:
+            # Keep a short tail of silence so words are not clipped
+            self.frames.append(data)
+            self.silence_run += self.frame_seconds
+        else:
+            self.silence_run += self.frame_seconds
+            self.stats["skipped_seconds"] += self.frame_seconds
+
+        duration = len(self.frames) * self.frame_seconds
+        if duration >= self.max_segment_seconds:
+            return self._close_segment()
+        if self.silence_run >= self.pause_seconds and duration >= self.min_segment_seconds:
+            return self._close_segment()
+        if self.silence_run >= self.max_pause_seconds:
+            return self._close_segment()
+        return None
+
+    def flush(self):
+        """Return any partially collected segment"""
+        if not self.frames:
+            return None
+        return self._close_segment()
+
+    def reset(self):
+        """Forget the open segment, keeping the counters (used when capture restarts)"""
+        self.frames = []
+        self.silence_run = 0.0
+
+    def _close_segment(self):
+        segment = self.frames
+        self.frames = []
+        self.silence_run = 0.0
+        self.stats["segments"] += 1
+        self.stats["segment_seconds"] += len(segment) * self.frame_seconds
+        return segment
+
+    def get_stats(self):
+        """Return a snapshot of the segmenter counters"""
+        stats = dict(self.stats)
+        total_seconds = stats["frames"] * self.frame_seconds
+        stats["total_seconds"] = total_seconds
+        stats["skipped_ratio"] = (
+            stats["skipped_seconds"] / total_seconds if total_seconds else 0.0
+        )
+        return stats
+
+
+class TranscriptReorderBuffer:
+    """Releases transcribed segments in sequence order regardless of completion order"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_sequence = 0
+        self.pending = {}
+
+    def complete(self, sequence, text, capture_times):
+        """
+        Record the result for a segment.
+
+        Args:
+            sequence: The segment's sequence number assigned at capture
+            text: Formatted transcript text, or None if the segment produced no text
+            capture_times: Monotonic (start, end) times of the segment's audio, or None if dropped
+
+        Returns:
+            List of (text, capture_times) tuples that are now ready, in spoken order
+        """
+        with self.lock:
+            self.pending[sequence] = (text, capture_times)
+            ready = []
+            while self.next_sequence in self.pending:
+                ready.append(self.pending.pop(self.next_sequence))
+                self.next_sequence += 1
+            return ready
+
+
 class ElevenLabsTranscriptionManager:
-    def __init__(self, callback_new_text=None):
+    def __init__(self, callback_new_text=None, streaming=True, use_vad=True):
         self.is_transcribing = False
         self.callback_new_text = callback_new_text
+        # Streaming mode runs capture, encoding and upload as separate pipeline
+        # stages so the microphone is never paused while a request is in flight
+        self.streaming = streaming
         self.api_key = os.environ.get("ELEVENLABS_API_KEY", "")
         
         # Define transcript directory and create if it doesn't exist
@@ -30,6 +180,47 @@ class ElevenLabsTranscriptionManager:
         self.recording_seconds = 10  # Process in 10-second chunks
         self.audio = None
         self.stream = None
+
+        # Streaming pipeline settings
+        self.segment_seconds = 2  # Shorter segments keep transcript latency low
+        self.max_queued_segments = 16  # Bound on each inter-stage queue
+        # Each start gets its own stop event, queues, workers and reorder buffer,
+        # handed to its threads, so a quick stop/start never mixes two runs
+        self.pipeline_stop = None
+        self.pipeline_threads = []
+
+        # Parallel uploads: segments are transcribed concurrently and reassembled in order
+        self.max_parallel_uploads = 3
+        self.upload_timeout = 30  # Seconds before an STT request is abandoned
+        self.upload_executor = None
+        self.reorder_buffer = None
+        self.delivery_lock = threading.Lock()
+
+        # Voice activity detection: segments close at pauses instead of fixed lengths
+        self.use_vad = use_vad
+        self.vad_energy_threshold = 500
+        self.vad_min_segment_seconds = 1.0
+        # Continuous speech is cut at this length so text keeps flowing while someone talks
+        self.vad_max_segment_seconds = 2.5
+        self.vad_pause_seconds = 0.5
+        self.vad = None
+
+        # Latency metrics: "latency" is seconds from the end of a segment's audio to
+        # text delivery, "speech_latency" from its first frame (includes the time
+        # spent collecting the segment)
+        self.stats_lock = threading.Lock()
+        self.latency_stats = {
+            "segments": 0,
+            "dropped_segments": 0,
+            "in_flight": 0,
+            "max_in_flight": 0,
+            "last_latency": 0.0,
+            "total_latency": 0.0,
+            "max_latency": 0.0,
+            "last_speech_latency": 0.0,
+            "total_speech_latency": 0.0,
+            "max_speech_latency": 0.0,
+        }
         
         # Create or clear the transcript file (now using the timestamped path)
         with open(self.transcript_file, "w") as f:
@@ -50,14 +241,37 @@ class ElevenLabsTranscriptionManager:
                 frames_per_buffer=self.chunk
             )
             
-            # Start a new thread for transcription
-            self.transcription_thread = threading.Thread(target=self._transcription_loop)
-            self.transcription_thread.daemon = True
-            self.transcription_thread.start()
+            if self.streaming:
+                self._start_pipeline()
+            else:
+                # Start a new thread for transcription
+                self.transcription_thread = threading.Thread(target=self._transcription_loop)
+                self.transcription_thread.daemon = True
+                self.transcription_thread.start()
     
     def stop_transcription(self):
         """Stop the transcription process"""
         self.is_transcribing = False
+        if self.pipeline_stop:
+            self.pipeline_stop.set()
+        # Let every stage finish its current read or wait before closing the stream
+        for thread in self.pipeline_threads:
+            thread.join(timeout=1.5)
+        self.pipeline_threads = []
+        if self.vad:
+            # The capture stage has stopped, so close its open segment here. Its
+            # uploads are being abandoned, so the partial segment is dropped rather
+            # than left to prefix the next run's first segment with stale audio
+            partial = self.vad.flush()
+            if partial:
+                print(
+                    f"[Transcription] Dropped {len(partial) * self.chunk / self.rate:.1f}s "
+                    "of audio cut off by stop"
+                )
+        if self.upload_executor:
+            # In-flight uploads finish in the background; their results are discarded
+            self.upload_executor.shutdown(wait=False)
+            self.upload_executor = None
         if self.stream:
             self.stream.stop_stream()
             self.stream.close()
@@ -82,35 +296,247 @@ class ElevenLabsTranscriptionManager:
                     continue
                 
                 # Convert to WAV format
-                audio_data = BytesIO()
-                with wave.open(audio_data, 'wb') as wf:
-                    wf.setnchannels(self.channels)
-                    wf.setsampwidth(self.audio.get_sample_size(self.format))
-                    wf.setframerate(self.rate)
-                    wf.writeframes(b''.join(frames))
-                
-                audio_data.seek(0)
+                audio_data = self._encode_wav(frames)
                 
                 # Send to ElevenLabs API
                 transcript = self._transcribe_with_elevenlabs(audio_data)
                 
                 # Process and save the transcript
                 if transcript:
-                    formatted_text = self._format_transcript(transcript)
-                    
-                    # Save to file
-                    with open(self.transcript_file, "a") as f:
-                        f.write(formatted_text)
-                    
-                    # Notify via callback
-                    if self.callback_new_text:
-                        self.callback_new_text(formatted_text)
+                    self._deliver_text(self._format_transcript(transcript))
                 
             except Exception as e:
                 print(f"Transcription error: {e}")
             
             # Short delay to prevent CPU overuse
             time.sleep(0.1)
+
+    def _start_pipeline(self):
+        """Start the capture -> encode -> upload pipeline threads"""
+        stop = threading.Event()
+        segment_queue = queue.Queue(maxsize=self.max_queued_segments)
+        upload_queue = queue.Queue(maxsize=self.max_queued_segments)
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_parallel_uploads, thread_name_prefix="stt-upload-worker"
+        )
+        slots = threading.BoundedSemaphore(self.max_parallel_uploads)
+        reorder_buffer = TranscriptReorderBuffer()
+        self.pipeline_stop = stop
+        self.upload_executor = executor
+        self.reorder_buffer = reorder_buffer
+        if self.use_vad and self.vad is None:
+            # Created once so the skipped-audio counters cover the whole meeting
+            self.vad = VoiceActivitySegmenter(
+                self.rate,
+                self.chunk,
+                energy_threshold=self.vad_energy_threshold,
+                min_segment_seconds=self.vad_min_segment_seconds,
+                max_segment_seconds=self.vad_max_segment_seconds,
+                pause_seconds=self.vad_pause_seconds,
+            )
+        elif self.vad:
+            # Never carry frames from before a pause into the new run
+            self.vad.reset()
+        self.pipeline_threads = [
+            threading.Thread(
+                target=self._capture_loop,
+                args=(stop, self.stream, segment_queue, reorder_buffer),
+                name="stt-capture",
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._encode_loop,
+                args=(stop, segment_queue, upload_queue, reorder_buffer),
+                name="stt-encode",
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._upload_loop,
+                args=(stop, upload_queue, executor, slots, reorder_buffer),
+                name="stt-upload",
+                daemon=True,
+            ),
+        ]
+        for thread in self.pipeline_threads:
+            thread.start()
+
+    def _enqueue(self, target_queue, item, reorder_buffer):
+        """Put an item on a bounded queue without blocking, dropping the oldest item if full"""
+        while True:
+            try:
+                target_queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    sequence, _, _ = target_queue.get_nowait()
+                    with self.stats_lock:
+                        self.latency_stats["dropped_segments"] += 1
+                    print("[Transcription] Pipeline backlog full, dropping oldest segment")
+                    # Fill the gap so later segments are not held back by the reorder buffer
+                    self._complete_segment(reorder_buffer, sequence, None, None)
+                except queue.Empty:
+                    pass
+
+    def _capture_loop(self, stop, stream, segment_queue, reorder_buffer):
+        """Pipeline stage 1: read audio continuously and cut it into short segments"""
+        frames_per_segment = max(1, int(self.rate / self.chunk * self.segment_seconds))
+        frames = []
+        sequence = 0
+        while not stop.is_set():
+            try:
+                data = stream.read(self.chunk, exception_on_overflow=False)
+            except Exception as e:
+                if not stop.is_set():
+                    print(f"Audio capture error: {e}")
+                break
+            if self.vad:
+                segment = self.vad.process(data)
+                if segment:
+                    self._enqueue(
+                        segment_queue,
+                        (sequence, segment, self._capture_times(segment)),
+                        reorder_buffer,
+                    )
+                    sequence += 1
+                continue
+            frames.append(data)
+            if len(frames) >= frames_per_segment:
+                self._enqueue(
+                    segment_queue, (sequence, frames, self._capture_times(frames)), reorder_buffer
+                )
+                sequence += 1
+                frames = []
+
+    def _capture_times(self, frames):
+        """Monotonic (start, end) of a just-captured segment, for latency measurement"""
+        ended_at = time.monotonic()
+        return (ended_at - len(frames) * self.chunk / self.rate, ended_at)
+
+    def _encode_loop(self, stop, segment_queue, upload_queue, reorder_buffer):
+        """Pipeline stage 2: wrap raw frames in an in-memory WAV container"""
+        while not stop.is_set():
+            try:
+                sequence, frames, capture_times = segment_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                audio_data = self._encode_wav(frames)
+            except Exception as e:
+                print(f"Audio encoding error: {e}")
+                self._complete_segment(reorder_buffer, sequence, None, None)
+                continue
+            self._enqueue(upload_queue, (sequence, audio_data, capture_times), reorder_buffer)
+
+    def _upload_loop(self, stop, upload_queue, executor, slots, reorder_buffer):
+        """Pipeline stage 3: dispatch encoded segments to the upload worker pool"""
+        while not stop.is_set():
+            # Wait for a free worker so backpressure stays on the bounded queue
+            if not slots.acquire(timeout=0.5):
+                continue
+            try:
+                sequence, audio_data, capture_times = upload_queue.get(timeout=0.5)
+            except queue.Empty:
+                slots.release()
+                continue
+            with self.stats_lock:
+                self.latency_stats["in_flight"] += 1
+                self.latency_stats["max_in_flight"] = max(
+                    self.latency_stats["max_in_flight"], self.latency_stats["in_flight"]
+                )
+            try:
+                executor.submit(
+                    self._upload_segment, reorder_buffer, slots, sequence, audio_data, capture_times
+                )
+            except RuntimeError:
+                # Executor was shut down by stop_transcription
+                slots.release()
+                break
+
+    def _upload_segment(self, reorder_buffer, slots, sequence, audio_data, capture_times):
+        """Worker task: transcribe one segment and hand the text to the reorder buffer"""
+        text = None
+        try:
+            transcript = self._transcribe_with_elevenlabs(audio_data)
+            if transcript:
+                text = self._format_transcript(transcript)
+        except Exception as e:
+            print(f"Transcription error: {e}")
+        finally:
+            with self.stats_lock:
+                self.latency_stats["in_flight"] -= 1
+            slots.release()
+        self._complete_segment(reorder_buffer, sequence, text, capture_times)
+
+    def _complete_segment(self, reorder_buffer, sequence, text, capture_times):
+        """Deliver every segment the reorder buffer releases, in spoken order"""
+        # Results from a previous start/stop cycle belong to a stale buffer and are dropped
+        if reorder_buffer is not self.reorder_buffer:
+            return
+        with self.delivery_lock:
+            for ready_text, ready_capture_times in reorder_buffer.complete(
+                sequence, text, capture_times
+            ):
+                if ready_text:
+                    self._deliver_text(ready_text)
+                if ready_capture_times is not None:
+                    started_at, ended_at = ready_capture_times
+                    now = time.monotonic()
+                    self._record_latency(now - ended_at, now - started_at)
+
+    def _encode_wav(self, frames):
+        """Convert raw paInt16 frames to an in-memory WAV file"""
+        audio_data = BytesIO()
+        with wave.open(audio_data, 'wb') as wf:
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(pyaudio.get_sample_size(self.format))
+            wf.setframerate(self.rate)
+            wf.writeframes(b''.join(frames))
+        audio_data.seek(0)
+        return audio_data
+
+    def _deliver_text(self, formatted_text):
+        """Save transcript text to file and notify the callback"""
+        # Save to file
+        with open(self.transcript_file, "a") as f:
+            f.write(formatted_text)
+
+        # Notify via callback
+        if self.callback_new_text:
+            self.callback_new_text(formatted_text)
+
+    def _record_latency(self, latency, speech_latency):
+        """Update end-to-end latency metrics for a delivered segment"""
+        with self.stats_lock:
+            stats = self.latency_stats
+            stats["segments"] += 1
+            stats["last_latency"] = latency
+            stats["total_latency"] += latency
+            stats["max_latency"] = max(stats["max_latency"], latency)
+            stats["last_speech_latency"] = speech_latency
+            stats["total_speech_latency"] += speech_latency
+            stats["max_speech_latency"] = max(stats["max_speech_latency"], speech_latency)
+        print(
+            f"[Transcription] Segment latency: {latency:.2f}s "
+            f"({speech_latency:.2f}s from first word)"
+        )
+
+    def get_latency_stats(self):
+        """Return a snapshot of the streaming latency metrics"""
+        with self.stats_lock:
+            stats = dict(self.latency_stats)
+        stats["avg_latency"] = (
+            stats["total_latency"] / stats["segments"] if stats["segments"] else 0.0
+        )
+        stats["avg_speech_latency"] = (
+            stats["total_speech_latency"] / stats["segments"] if stats["segments"] else 0.0
+        )
+        return stats
+
+    def get_vad_stats(self):
+        """Return voice activity counters, including seconds of silence skipped"""
+        if not self.vad:
+            return None
+        return self.vad.get_stats()
     
     def _transcribe_with_elevenlabs(self, audio_data):
         """Send audio to ElevenLabs API for transcription"""
@@ -137,7 +563,9 @@ class ElevenLabsTranscriptionManager:
                 # "language_code": "en"
             }
             
-            response = requests.post(url, headers=headers, files=files, data=data)
+            response = http_client.post(
+                url, headers=headers, files=files, data=data, timeout=self.upload_timeout
+            )
             
             if response.status_code == 200:
                 return response.json()
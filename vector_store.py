@@ -0,0 +1,286 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from embedding_store import EmbeddingStore
+
+# Directory holding the local index files (override with LOCAL_VECTOR_STORE_PATH)
+LOCAL_VECTOR_STORE_PATH = os.environ.get(
+    "LOCAL_VECTOR_STORE_PATH", os.path.join("data", "vector_store")
+)
+
+
+class VectorStore(ABC):
+    """Interface shared by the Pinecone and local vector store backends"""
+
+    @abstractmethod
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        namespace: str = "",
+        filter: Optional[Dict[str, Any]] = None,
+        include_metadata: bool = True,
+        include_values: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Search the store for similar vectors.
+
+        Returns:
+            Dict with "success", "results" (containing "matches") and "message" on failure
+        """
+
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    """Evaluate one Pinecone-style metadata condition against a stored value."""
+    # List-valued metadata (e.g. labels) matches if any element matches
+    values = value if isinstance(value, list) else [value]
+    if not isinstance(condition, dict):
+        return condition in values
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            ok = operand in values
+        elif operator == "$ne":
+            ok = operand not in values
+        elif operator == "$in":
+            ok = any(v in operand for v in values)
+        elif operator == "$nin":
+            ok = not any(v in operand for v in values)
+        elif operator in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None or isinstance(value, list):
+                ok = False
+            elif operator == "$gt":
+                ok = value > operand
+            elif operator == "$gte":
+                ok = value >= operand
+            elif operator == "$lt":
+                ok = value < operand
+            else:
+                ok = value <= operand
+        else:
+            raise ValueError(f"Unsupported filter operator: {operator}")
+        if not ok:
+            return False
+    return True
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector index doing cosine top-k over a NumPy matrix"""
+
+    def __init__(
+        self,
+        ids: Optional[List[str]] = None,
+        vectors: Optional[np.ndarray] = None,
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            ids: Vector ids, one per row
+            vectors: Embedding matrix of shape (len(ids), dimension)
+            metadata: Metadata dict for each row
+        """
+        self.lock = threading.Lock()
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.norms = np.zeros(0, dtype=np.float32)
+        # Filter masks are cached; the agent only ever uses a handful of filters
+        self._mask_cache: Dict[str, np.ndarray] = {}
+        if ids:
+            self.add(ids, vectors, metadata)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(
+        self,
+        ids: List[str],
+        vectors: Any,
+        metadata: Optional[List[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Add or replace vectors.
+
+        Args:
+            ids: Vector ids
+            vectors: Matrix or list of embeddings, one per id
+            metadata: Metadata dict for each id
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        metadata = metadata or [{} for _ in ids]
+        with self.lock:
+            positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+            new_rows = []
+            for vector_id, vector, meta in zip(ids, vectors, metadata):
+                if vector_id in positions:
+                    row = positions[vector_id]
+                    self._ensure_writable()
+                    self.vectors[row] = vector
+                    self.metadata[row] = meta
+                else:
+                    positions[vector_id] = len(self.ids) + len(new_rows)
+                    new_rows.append((vector_id, vector, meta))
+            if new_rows:
+                stacked = np.stack([vector for _, vector, _ in new_rows])
+                self.vectors = (
+                    stacked if len(self.ids) == 0 else np.vstack([self.vectors, stacked])
+                )
+                self.ids.extend(vector_id for vector_id, _, _ in new_rows)
+                self.metadata.extend(meta for _, _, meta in new_rows)
+            self.norms = _row_norms(self.vectors)
+            self._mask_cache = {}
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove vectors by id."""
+        remove = set(ids)
+        with self.lock:
+            keep = [i for i, vector_id in enumerate(self.ids) if vector_id not in remove]
+            self.ids = [self.ids[i] for i in keep]
+            self.metadata = [self.metadata[i] for i in keep]
+            self.vectors = self.vectors[keep]
+            self.norms = self.norms[keep]
+            self._mask_cache = {}
+
+    def _ensure_writable(self) -> None:
+        # Memory-mapped matrices are read-only; copy before the first in-place update
+        if not self.vectors.flags.writeable:
+            self.vectors = np.array(self.vectors)
+
+    def _filter_mask(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        if not filter:
+            return None
+        key = json.dumps(filter, sort_keys=True, default=str)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (self._matches_filter(meta, filter) for meta in self.metadata),
+                dtype=bool,
+                count=len(self.metadata),
+            )
+            self._mask_cache[key] = mask
+        return mask
+
+    def _matches_filter(self, meta: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+        for field, condition in filter.items():
+            if field == "$and":
+                if not all(self._matches_filter(meta, sub) for sub in condition):
+                    return False
+            elif field == "$or":
+                if not any(self._matches_filter(meta, sub) for sub in condition):
+                    return False
+            elif not _matches_condition(meta.get(field), condition):
+                return False
+        return True
+
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        namespace: str = "",
+        filter: Optional[Dict[str, Any]] = None,
+        include_metadata: bool = True,
+        include_values: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Return the top_k rows by cosine similarity, restricted by a metadata filter.
+
+        Args:
+            query_vector: The query vector to search for (list of floats)
+            top_k: Number of results to return
+            namespace: Ignored; the local store has a single namespace
+            filter: Pinecone-style metadata filter, e.g. {"source": {"$eq": "jira_ticket"}}
+            include_metadata: Whether to include metadata in the results
+            include_values: Whether to include vector values in the results
+
+        Returns:
+            Dict containing search results in the same shape as the Pinecone backend
+        """
+        try:
+            with self.lock:
+                if not self.ids:
+                    return {"success": True, "results": {"matches": []}}
+
+                query = np.asarray(query_vector, dtype=np.float32)
+                query_norm = float(np.linalg.norm(query)) or 1.0
+                mask = self._filter_mask(filter)
+                rows = np.arange(len(self.ids)) if mask is None else np.flatnonzero(mask)
+
+                if rows.size == 0:
+                    return {"success": True, "results": {"matches": []}}
+
+                norms = self.norms[rows]
+                norms[norms == 0] = 1.0
+                scores = (self.vectors[rows] @ query) / (norms * query_norm)
+
+                k = min(top_k, rows.size)
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top])]
+
+                matches = []
+                for i in top:
+                    row = int(rows[i])
+                    match = {"id": self.ids[row], "score": float(scores[i])}
+                    if include_metadata:
+                        match["metadata"] = dict(self.metadata[row])
+                    if include_values:
+                        match["values"] = self.vectors[row].tolist()
+                    matches.append(match)
+
+            return {"success": True, "results": {"matches": matches}}
+
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Error searching local vector store: {str(e)}",
+                "results": None,
+            }
+
+    def save(self, directory: str = LOCAL_VECTOR_STORE_PATH, dtype: str = "float32") -> None:
+        """Write the store to directory in the EmbeddingStore format."""
+        with self.lock:
+            dimension = self.vectors.shape[1] if self.ids else 0
+            store = EmbeddingStore.open_or_create(directory, dimension, dtype)
+            store.rewrite(self.ids, self.vectors, self.metadata)
+
+    @classmethod
+    def from_embedding_store(cls, store: EmbeddingStore, mmap: bool = True):
+        """
+        Build a local index over an EmbeddingStore.
+
+        Args:
+            store: An opened EmbeddingStore
+            mmap: Memory-map the matrix instead of reading it into memory
+        """
+        ids, vectors, metadata = store.load(mmap=mmap)
+        local_store = cls()
+        local_store.ids = ids
+        local_store.metadata = metadata
+        local_store.vectors = vectors
+        local_store.norms = _row_norms(vectors)
+        return local_store
+
+    @classmethod
+    def load(cls, directory: str = LOCAL_VECTOR_STORE_PATH, mmap: bool = True):
+        """
+        Load a store written by save() or the ingestion script.
+
+        Args:
+            directory: EmbeddingStore directory
+            mmap: Memory-map the matrix instead of reading it into memory
+        """
+        if not EmbeddingStore.exists(directory):
+            raise FileNotFoundError(f"No embedding store at {directory}")
+        return cls.from_embedding_store(EmbeddingStore(directory), mmap=mmap)
+
+
+def _row_norms(vectors: np.ndarray) -> np.ndarray:
+    """Row L2 norms in float32, without materializing a float32 copy of the matrix."""
+    if vectors.size == 0:
+        return np.zeros(vectors.shape[0], dtype=np.float32)
+    return np.sqrt(np.einsum("ij,ij->i", vectors, vectors, dtype=np.float32))